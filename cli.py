@@ -0,0 +1,525 @@
+"""
+Headless command-line entry point.
+
+Runs the same TexturePackerCore logic as the GUI without importing Qt, so it
+can be used on build servers and render-farm nodes:
+
+    python cli.py pack    <folder | bundle.zip | bundle.tar.gz>
+    python cli.py unpack  <folder>
+    python cli.py submit  <folder> --queue <shared_dir> [--wait]
+    python cli.py node    --queue <shared_dir>
+    python cli.py serve   [--port 8765]
+    python cli.py verify  <folder>
+    python cli.py atlas   <folder> --name props
+"""
+import argparse
+import dataclasses
+import functools
+import os
+import re
+import sys
+import time
+
+from core.atlas import build_atlas
+from core.archive_io import ArchiveWriter, default_output_archive, is_archive, require_random_access
+from core.pack_client import DEFAULT_PORT, DEFAULT_URL, PackClient, PackServiceError
+from core.pack_service import PackService
+from core.pack_plan import PackPlan
+from core.scheduler import PackScheduler
+from core.source_descriptor import find_layered_sources
+from core.staged_engine import StagedEngine
+from core.texture_packer import UNPACK_SKIPPED, TexturePackerCore
+from core.udim import TileSetTracker, group_tiles, validate_tile_set
+from core.verify import OK, UNRECORDED, find_outputs, verify_outputs
+from core.work_queue import WorkQueue
+from worker.queue_node import QueueNode
+
+_TAG_RE = re.compile(r"<[^>]+>")
+
+
+def _plain(message: str) -> str:
+    """Drop the HTML markup used for the GUI log."""
+    return _TAG_RE.sub("", message)
+
+
+def _echo(message: str):
+    print(_plain(message), flush=True)
+
+
+def _suffixes_from_args(args) -> dict[str, str]:
+    return {
+        'ao': args.ao,
+        'roughness': args.roughness,
+        'metallic': args.metallic,
+    }
+
+
+def _stage_sizes(value: str) -> tuple[int, int]:
+    """'4:2' → (4, 2) decode / encode workers for --staged."""
+    try:
+        decode, encode = (int(n) for n in value.split(":"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected DECODE:ENCODE worker counts, got '{value}'")
+    if decode < 1 or encode < 1:
+        raise argparse.ArgumentTypeError("both stages need at least one worker")
+    return decode, encode
+
+
+def _add_suffix_args(parser: argparse.ArgumentParser):
+    parser.add_argument("--ao", default="_ao", help="AO suffix(es), comma-separated")
+    parser.add_argument("--roughness", default="_roughness", help="Roughness suffix(es)")
+    parser.add_argument("--metallic", default="_metallic", help="Metallic suffix(es)")
+
+
+def _tile_tracker(plan: PackPlan, suffixes) -> tuple[TileSetTracker, set[str]]:
+    """Validate the plan's UDIM / UV-tile sets; returns (tracker, bases to skip)."""
+    textures = plan.textures()
+    sizes = {g.base: (g.width, g.height) for g in plan.groups if g.pixels}
+    valid, skipped = {}, set()
+    for name, tile_set in group_tiles(textures).items():
+        errors, warnings = validate_tile_set(tile_set, textures, suffixes, sizes)
+        _echo(f"🧩 Tile set {name}: {len(tile_set.tiles)} tile(s) ({tile_set.tile_range})")
+        for warning in warnings:
+            _echo(f"⚠️ {name}: {warning}")
+        if errors:
+            _echo(f"⚠️ Skipping tile set '{name}': {'; '.join(errors)}")
+            skipped.update(tile_set.bases)
+        else:
+            valid[name] = tile_set
+    return TileSetTracker(valid), skipped
+
+
+def _report(tracker: TileSetTracker | None, base: str, success: bool, message: str, verbose: bool = False):
+    """
+    Echo one group's result. Tiles of a set are summed up in one line once
+    the set is done; single tiles are only echoed on failure or *verbose*.
+    """
+    if not (tracker and tracker.owns(base)):
+        _echo(f"✅ {message}" if success else f"⚠️ Error in '{base}': {message}")
+    elif verbose or not success:
+        _echo(f"   {'✅' if success else '⚠️'} tile {base}: {message}")
+    summary = tracker.record(base, success, message) if tracker else None
+    if summary:
+        ok, text = summary
+        _echo(f"{'✅' if ok else '⚠️'} {text}")
+
+
+# ---------------------------------------------------------------------- #
+#  Commands                                                                #
+# ---------------------------------------------------------------------- #
+
+def cmd_pack(args) -> int:
+    suffixes = _suffixes_from_args(args)
+    required = [s.lower() for s in suffixes.values()]
+
+    layout = {
+        tex_type: selector
+        for tex_type, selector in (
+            ('ao', args.ao_source),
+            ('roughness', args.roughness_source),
+            ('metallic', args.metallic_source),
+        )
+        if selector
+    }
+    if layout:
+        return _pack_layered(layout, suffixes, args)
+    if args.server:
+        return _pack_via_service(args, suffixes)
+
+    tracker, skipped = None, set()
+
+    # Archives are streamed in one pass into a sibling *_ORM.zip by default;
+    # folders are planned with a single scan and packed in place
+    output = args.output or (default_output_archive(args.folder) if is_archive(args.folder) else args.folder)
+    if is_archive(args.folder) and not args.dry_run:
+        groups = TexturePackerCore.iter_archive_groups(args.folder, suffixes)
+    else:
+        plan = PackPlan.build(args.folder, suffixes, read_headers=args.dry_run or args.workers > 1 or args.staged,
+                              output=output)
+        if args.dry_run:
+            for line in plan.report():
+                _echo(line)
+            return 0
+        if args.skip_up_to_date:
+            fresh = [g for g in plan.groups if g.up_to_date]
+            for g in fresh:
+                _echo(f"✔️ '{g.base}' is up to date")
+            plan = dataclasses.replace(plan, groups=tuple(g for g in plan.groups if not g.up_to_date))
+        tracker, skipped = _tile_tracker(plan, suffixes)
+        if skipped:
+            plan = dataclasses.replace(plan, groups=tuple(g for g in plan.groups if g.base not in skipped))
+        groups = plan.textures().items()
+
+    writer = ArchiveWriter(output) if output.lower().endswith((".zip", ".tar")) else None
+    if (args.workers > 1 or args.staged) and writer is None and not is_archive(args.folder):
+        return _pack_scheduled(plan, output, suffixes, args, tracker, len(skipped))
+
+    packed_count = 0
+    total = len(skipped)
+    try:
+        for base, maps in groups:
+            total += 1
+            missing = [key for key in required if key not in maps]
+            if missing:
+                _echo(f"⚠️ Skipping '{base}': missing {', '.join(sorted(missing))}")
+                continue
+            success, message = TexturePackerCore.process_texture(
+                base, maps, output, suffixes, writer=writer,
+                concurrent_decode=args.concurrent_decode, parallel_encode=args.parallel_encode,
+            )
+            _report(tracker, base, success, message, args.verbose)
+            packed_count += success
+    finally:
+        if writer:
+            writer.close()
+
+    _echo(f"🏁 Finished. Packed {packed_count}/{total} successfully.")
+    return 0 if packed_count == total else 1
+
+
+def _pack_via_service(args, suffixes) -> int:
+    """'pack' handed to a running `cli.py serve` instead of packing here."""
+    client = PackClient(args.server)
+    folder = os.path.abspath(args.folder)
+    output = os.path.abspath(args.output) if args.output else None
+    try:
+        reply = client.pack_folder(folder, suffixes, output)
+    except PackServiceError as e:
+        _echo(f"❌ {e}")
+        return 2
+
+    results = reply["results"]
+    for r in results:
+        if r["ok"]:
+            _echo(f"✅ {r['message']} ({r['timings']['total_ms']:.0f} ms)")
+        else:
+            _echo(f"⚠️ Error in '{r['base']}': {r['message']}")
+    packed_count = sum(r["ok"] for r in results)
+    _echo(f"🏁 Finished. Packed {packed_count}/{len(results)} successfully.")
+    return 0 if reply["ok"] else 1
+
+
+def _pack_layered(layout: dict[str, str], suffixes, args) -> int:
+    """'pack' from layered / multi-channel files: one file per group."""
+    if len(layout) != 3:
+        _echo("❌ --ao-source, --roughness-source and --metallic-source must be given together")
+        return 2
+
+    textures = find_layered_sources(args.folder, suffixes, layout)
+    output = args.output or args.folder
+    if args.dry_run:
+        for base, maps in textures.items():
+            _echo(f"➡️ {base}: " + ", ".join(maps.values()))
+        return 0
+
+    packed_count = 0
+
+    def on_result(job, success, message):
+        nonlocal packed_count
+        _echo(f"✅ {message}" if success else f"⚠️ Error in '{job.base}': {message}")
+        packed_count += success
+
+    scheduler = PackScheduler(args.memory_budget, args.workers)
+    jobs = scheduler.plan(textures, suffixes)
+    if args.workers > 1:
+        scheduler.run(jobs, output, suffixes, on_result)
+    else:
+        for job in jobs:
+            on_result(job, *TexturePackerCore.process_texture(
+                job.base, job.maps, output, suffixes,
+                concurrent_decode=args.concurrent_decode, parallel_encode=args.parallel_encode,
+            ))
+
+    _echo(f"🏁 Finished. Packed {packed_count}/{len(textures)} successfully.")
+    return 0 if packed_count == len(textures) else 1
+
+
+def _pack_scheduled(plan: PackPlan, output, suffixes, args, tracker=None, skipped=0) -> int:
+    """
+    Parallel variant of 'pack': jobs admitted against --memory-budget, or
+    run through the decode/encode stages with --staged.
+    The tiles of a UDIM set are independent jobs, so they spread across workers.
+    """
+    scheduler = PackScheduler(args.memory_budget, args.workers)
+    jobs = scheduler.jobs_from_plan(plan)
+    if args.staged:
+        scheduler = StagedEngine(*args.staged, memory_budget_mb=args.memory_budget)
+    for g in plan.groups:
+        if g.missing:
+            _echo(f"⚠️ Skipping '{g.base}': missing {', '.join(sorted(g.missing))}")
+
+    packed_count = 0
+
+    def on_result(job, success, message):
+        nonlocal packed_count
+        _report(tracker, job.base, success, message, args.verbose)
+        packed_count += success
+
+    scheduler.run(jobs, output, suffixes, on_result)
+    total = len(plan.groups) + skipped
+    _echo(f"🏁 Finished. Packed {packed_count}/{total} successfully.")
+    return 0 if packed_count == total else 1
+
+
+def cmd_unpack(args) -> int:
+    suffixes = _suffixes_from_args(args)
+    channels = tuple(c.strip() for c in args.channels.split(",") if c.strip())
+    unknown = set(channels) - set(suffixes)
+    if unknown:
+        _echo(f"❌ Unknown channel(s): {', '.join(sorted(unknown))}")
+        return 2
+
+    task = functools.partial(
+        TexturePackerCore.unpack_group, channels=channels, overwrite=args.overwrite
+    )
+
+    unpacked_count = skipped_count = total = 0
+
+    def on_result(base, success, message):
+        nonlocal unpacked_count, skipped_count
+        if success and message.startswith(UNPACK_SKIPPED):
+            _echo(f"➖ {message}")
+            skipped_count += 1
+        elif success:
+            _echo(f"✅ {message}")
+            unpacked_count += 1
+        else:
+            _echo(f"⚠️ Error in '{base}': {message}")
+
+    if is_archive(args.folder):
+        # Bundles are streamed in one pass, one ORM at a time (--workers
+        # does not apply); maps go next to the bundle, as in the GUI
+        output = args.output or os.path.dirname(os.path.abspath(args.folder))
+        for base, data in TexturePackerCore.iter_archive_packed(args.folder):
+            total += 1
+            on_result(base, *task(base, {'orm': data}, output, suffixes))
+    else:
+        output = args.output or args.folder
+        packed = TexturePackerCore.find_packed_textures(args.folder)
+        total = len(packed)
+        scheduler = PackScheduler(args.memory_budget, args.workers)
+        jobs = scheduler.plan_unpack(packed)
+        if args.workers > 1:
+            scheduler.run(jobs, output, suffixes,
+                          lambda job, success, message: on_result(job.base, success, message), task=task)
+        else:
+            for job in jobs:
+                on_result(job.base, *task(job.base, job.maps, output, suffixes))
+
+    skipped_note = f", {skipped_count} skipped (maps already exist)" if skipped_count else ""
+    _echo(f"🏁 Finished. Unpacked {unpacked_count}/{total} successfully{skipped_note}.")
+    return 0 if unpacked_count + skipped_count == total else 1
+
+
+def cmd_submit(args) -> int:
+    queue = WorkQueue(args.queue, lease_seconds=args.lease, max_attempts=args.max_attempts)
+    try:
+        run_id, count = queue.enqueue_run(args.folder, _suffixes_from_args(args), args.output)
+    except ValueError as e:
+        _echo(f"❌ {e}")
+        return 2
+    _echo(f"📤 Queued run {run_id} with {count} group(s) in {queue.db_path}")
+
+    if not args.wait:
+        return 0
+
+    # Coordinator mode: poll until every job is done or failed, then report
+    while not queue.is_drained(run_id):
+        counts = queue.summary(run_id)
+        _echo(f"   pending={counts['pending']} leased={counts['leased']} "
+              f"done={counts['done']} failed={counts['failed']}")
+        time.sleep(args.poll)
+
+    failed = 0
+    for row in queue.results(run_id):
+        if row["state"] == "done":
+            _echo(f"✅ [{row['lease_owner']}] {row['message']}")
+        else:
+            failed += 1
+            _echo(f"⚠️ Error in '{row['base']}' after {row['attempts']} attempt(s): {row['message']}")
+
+    _echo(f"🏁 Run {run_id} finished. Packed {count - failed}/{count} successfully.")
+    return 0 if failed == 0 else 1
+
+
+def cmd_node(args) -> int:
+    queue = WorkQueue(args.queue, lease_seconds=args.lease, max_attempts=args.max_attempts)
+    node = QueueNode(queue, node_id=args.node_id, poll_interval=args.poll, log_callback=_echo)
+    node.run(run_id=args.run_id, exit_when_drained=not args.forever)
+    return 0
+
+
+# ---------------------------------------------------------------------- #
+#  Argument parsing                                                        #
+# ---------------------------------------------------------------------- #
+
+def cmd_serve(args) -> int:
+    try:
+        service = PackService(args.host, args.port, args.workers, args.cache_mb, args.allow_remote)
+    except ValueError as e:
+        _echo(f"❌ {e} (--allow-remote)")
+        return 2
+    if args.allow_remote:
+        _echo("⚠️ Remote access is on: anyone who can reach this port can read and write "
+              "any file this user can. Only use it on a trusted, firewalled network.")
+    _echo(f"🔧 Packer service listening on {service.address} "
+          f"({service.max_workers} worker(s), {args.cache_mb} MB map cache)")
+    try:
+        service.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    _echo("🏁 Packer service stopped.")
+    return 0
+
+
+def cmd_verify(args) -> int:
+    paths = find_outputs(args.folder)
+    _echo(f"🔍 Verifying {len(paths)} output(s) in {args.folder}")
+
+    counts: dict[str, int] = {}
+    for result in verify_outputs(paths, args.workers, args.samples):
+        counts[result.status] = counts.get(result.status, 0) + 1
+        name = os.path.basename(result.path)
+        if result.status == OK:
+            if args.verbose:
+                _echo(f"✅ {name}")
+        elif result.status == UNRECORDED:
+            if args.verbose:
+                _echo(f"ℹ️ {name}: {result.message}")
+        else:
+            _echo(f"❌ {name}: {result.status} — {result.message}")
+
+    summary = ", ".join(f"{n} {status}" for status, n in sorted(counts.items())) or "nothing to check"
+    _echo(f"🏁 Finished. {summary}.")
+    return 0 if set(counts) <= {OK, UNRECORDED} else 1
+
+
+def cmd_atlas(args) -> int:
+    suffixes = _suffixes_from_args(args)
+    try:
+        require_random_access(args.folder)
+    except ValueError as e:
+        _echo(f"❌ {e}")
+        return 2
+    plan = PackPlan.build(args.folder, suffixes)
+    for g in plan.groups:
+        if g.missing:
+            _echo(f"⚠️ Skipping '{g.base}': missing {', '.join(sorted(g.missing))}")
+        elif not g.pixels:
+            _echo(f"⚠️ Skipping '{g.base}': could not read image headers")
+    groups = [g for g in plan.groups if g.complete and g.pixels]
+    if not groups:
+        _echo("⚠️ No complete texture groups found.")
+        return 1
+
+    manifest, placed = build_atlas(
+        {g.base: g.maps for g in groups},
+        {g.base: (g.width, g.height) for g in groups},
+        suffixes,
+        args.output or args.folder,
+        name=args.name,
+        page_size=args.page_size,
+        padding=args.padding,
+        power_of_two=not args.no_pot,
+        max_workers=args.workers,
+        log_callback=_echo,
+    )
+
+    _echo(f"🏁 Finished. Placed {placed}/{len(plan.groups)} group(s); UV rects in {manifest}")
+    return 0 if placed == len(plan.groups) else 1
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="orm-packer", description="ORM texture packer (headless)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("pack", help="Pack a folder or zip/tar bundle on this machine")
+    p.add_argument("folder")
+    p.add_argument("--output", help="Output folder, or a .zip/.tar to store results in (default: input folder)")
+    p.add_argument("--workers", type=int, default=1, help="Pack groups in parallel processes (folders only)")
+    p.add_argument("--memory-budget", type=int, default=2048, help="RAM budget in MB for parallel packing")
+    p.add_argument("--dry-run", action="store_true", help="Print the pack plan and exit without packing")
+    p.add_argument("--skip-up-to-date", action="store_true", help="Skip groups whose *_ORM.png is newer than all sources")
+    p.add_argument("--verbose", action="store_true", help="Also list each packed UDIM / UV tile, not just the set summary")
+    p.add_argument("--concurrent-decode", action="store_true",
+                   help="Decode each group's three maps on parallel threads (single-worker runs)")
+    p.add_argument("--parallel-encode", action="store_true",
+                   help="Compress large PNG outputs on all cores (single-worker runs)")
+    p.add_argument("--staged", type=_stage_sizes, metavar="DECODE:ENCODE",
+                   help="Separate decode and encode process stages sharing planes via shared memory, e.g. 4:2")
+    p.add_argument("--server", nargs="?", const=DEFAULT_URL,
+                   help=f"Send the folder to a running 'serve' instead (default {DEFAULT_URL})")
+    p.add_argument("--ao-source", help="Take AO from a layer/page/channel of each PSD/TIFF/PNG, e.g. 'layer=AO' or 'channel=G'")
+    p.add_argument("--roughness-source", help="Selector for roughness, e.g. 'layer=Roughness', 'page=1'")
+    p.add_argument("--metallic-source", help="Selector for metallic, e.g. 'channel=R'")
+    _add_suffix_args(p)
+    p.set_defaults(func=cmd_pack)
+
+    p = sub.add_parser("unpack", help="Split *_ORM textures back into AO / roughness / metallic maps")
+    p.add_argument("folder")
+    p.add_argument("--output", help="Output folder (default: same as input)")
+    p.add_argument("--channels", default="ao,roughness,metallic", help="Channels to write, comma-separated")
+    p.add_argument("--overwrite", action="store_true", help="Replace existing channel maps")
+    p.add_argument("--workers", type=int, default=1, help="Unpack files in parallel processes")
+    p.add_argument("--memory-budget", type=int, default=2048, help="RAM budget in MB for parallel unpacking")
+    _add_suffix_args(p)
+    p.set_defaults(func=cmd_unpack)
+
+    def _add_queue_args(q: argparse.ArgumentParser):
+        q.add_argument("--queue", required=True, help="Shared folder holding the work queue")
+        q.add_argument("--lease", type=float, default=60.0, help="Lease length in seconds")
+        q.add_argument("--max-attempts", type=int, default=3, help="Give up after this many expired leases")
+        q.add_argument("--poll", type=float, default=1.0, help="Polling interval in seconds")
+
+    p = sub.add_parser("submit", help="Split a folder into queued group jobs")
+    p.add_argument("folder")
+    p.add_argument("--output", help="Output folder (default: same as input)")
+    p.add_argument("--wait", action="store_true", help="Wait for nodes to drain the run and aggregate results")
+    _add_queue_args(p)
+    _add_suffix_args(p)
+    p.set_defaults(func=cmd_submit)
+
+    p = sub.add_parser("node", help="Drain the work queue as a packer node")
+    p.add_argument("--node-id", help="Node name shown in results (default: host:pid)")
+    p.add_argument("--run-id", help="Only take jobs from this run")
+    p.add_argument("--forever", action="store_true", help="Keep polling after the queue is drained")
+    _add_queue_args(p)
+    p.set_defaults(func=cmd_node)
+
+    p = sub.add_parser("serve", help="Keep a warm packer running and take jobs over localhost HTTP")
+    p.add_argument("--host", default="127.0.0.1", help="Interface to bind (default: localhost only)")
+    p.add_argument("--allow-remote", action="store_true",
+                   help="Allow binding --host to a non-loopback interface (no authentication!)")
+    p.add_argument("--port", type=int, default=DEFAULT_PORT)
+    p.add_argument("--workers", type=int, default=None, help="Packing threads (default: CPU count)")
+    p.add_argument("--cache-mb", type=int, default=1024, help="Memory for cached decoded maps")
+    p.set_defaults(func=cmd_serve)
+
+    p = sub.add_parser("verify", help="Check *_ORM.png outputs for corruption, truncation and stale sources")
+    p.add_argument("folder")
+    p.add_argument("--workers", type=int, default=None, help="Files checked in parallel (default: CPU count)")
+    p.add_argument("--samples", type=int, default=32, help="Source pixels compared per channel (0 = skip)")
+    p.add_argument("--verbose", action="store_true", help="Also list outputs that passed")
+    p.set_defaults(func=cmd_verify)
+
+    p = sub.add_parser("atlas", help="Pack all groups of a folder into shared ORM atlas pages")
+    p.add_argument("folder")
+    p.add_argument("--name", default="atlas", help="Base name of the pages and the .json manifest")
+    p.add_argument("--output", help="Output folder (default: same as input)")
+    p.add_argument("--page-size", type=int, default=2048, help="Maximum page width/height in pixels")
+    p.add_argument("--padding", type=int, default=2, help="Edge-colour padding around each texture")
+    p.add_argument("--no-pot", action="store_true", help="Do not round trimmed pages up to powers of two")
+    p.add_argument("--workers", type=int, default=None, help="Decode threads (default: CPU count)")
+    _add_suffix_args(p)
+    p.set_defaults(func=cmd_atlas)
+
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,227 @@
+import io
+import os
+import posixpath
+import tarfile
+import threading
+import zipfile
+from collections import OrderedDict
+from collections.abc import Iterator
+
+# Separator between an archive path and a member inside it:
+#   /drops/rocks.zip::textures/rock_wall_AO.png
+ARCHIVE_SEP = "::"
+
+
+def is_archive(path: str) -> bool:
+    """True if *path* is a zip or tar (optionally compressed) file."""
+    if not os.path.isfile(path):
+        return False
+    return zipfile.is_zipfile(path) or tarfile.is_tarfile(path)
+
+
+def default_output_archive(archive_path: str) -> str:
+    """'/drops/rocks.tar.gz' → '/drops/rocks_ORM.zip'."""
+    stem = archive_path
+    for ext in (".gz", ".bz2", ".xz", ".tgz", ".tar", ".zip"):
+        if stem.lower().endswith(ext):
+            stem = stem[: -len(ext)]
+    return f"{stem}_ORM.zip"
+
+
+def member_ref(archive_path: str, member: str) -> str:
+    return f"{archive_path}{ARCHIVE_SEP}{member}"
+
+
+def split_member_ref(ref: str) -> tuple[str, str] | None:
+    """Return (archive_path, member) for a member reference, else None."""
+    archive_path, sep, member = ref.rpartition(ARCHIVE_SEP)
+    if not sep or not archive_path:
+        return None
+    return archive_path, member
+
+
+def open_source(source: str | bytes):
+    """
+    Turn a texture source into something Image.open accepts.
+
+    *source* may be a plain file path, an archive member reference or the
+    already-read bytes of a member.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source)
+    ref = split_member_ref(source)
+    if ref is None:
+        return source
+    archive_path, member = ref
+    return io.BytesIO(_shared_reader(archive_path).read(member))
+
+
+# Readers kept open across open_source calls, so a run that resolves many
+# member refs of one bundle parses its index once instead of per member
+_MAX_READERS = 4
+_readers: OrderedDict[tuple, "ArchiveReader"] = OrderedDict()
+_readers_lock = threading.Lock()
+
+
+def _shared_reader(archive_path: str) -> "ArchiveReader":
+    st = os.stat(archive_path)
+    key = (os.path.abspath(archive_path), st.st_mtime_ns, st.st_size)
+    with _readers_lock:
+        reader = _readers.get(key)
+        if reader is not None:
+            _readers.move_to_end(key)
+            return reader
+        reader = ArchiveReader(archive_path)
+        if not reader.random_access:
+            reader.close()
+            raise ValueError(_streaming_only(archive_path))
+        _readers[key] = reader
+        while len(_readers) > _MAX_READERS:
+            _key, old = _readers.popitem(last=False)
+            old.close()
+        return reader
+
+
+def _streaming_only(archive_path: str) -> str:
+    return (
+        f"{os.path.basename(archive_path)} is a compressed tarball, which can only be read "
+        "front to back in one pass: pack it directly, or repack it as .zip or plain .tar"
+    )
+
+
+def require_random_access(path: str):
+    """
+    Raise ValueError if *path* is a bundle whose members cannot be read in
+    any order. For paths that hand member refs to other processes or
+    requests (work queue, service, atlas) instead of streaming the bundle.
+    """
+    if is_archive(path):
+        with ArchiveReader(path) as reader:
+            if not reader.random_access:
+                raise ValueError(_streaming_only(path))
+
+
+class ArchiveReader:
+    """
+    Read-only view over a zip or tar bundle.
+
+    iter_members() walks the archive strictly front to back, so compressed
+    tarballs are read as a stream in one pass and nothing is extracted to disk.
+    """
+
+    def __init__(self, archive_path: str):
+        self.archive_path = archive_path
+        self._zip: zipfile.ZipFile | None = None
+        self._tar: tarfile.TarFile | None = None
+        self._lock = threading.Lock()     # read() may be shared by threads
+        if zipfile.is_zipfile(archive_path):
+            self._zip = zipfile.ZipFile(archive_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        with self._lock:
+            if self._zip:
+                self._zip.close()
+            if self._tar:
+                self._tar.close()
+
+    def names(self) -> list[str]:
+        """Member names of regular files, in archive order."""
+        if self._zip:
+            return [i.filename for i in self._zip.infolist() if not i.is_dir()]
+        with tarfile.open(self.archive_path, mode="r|*") as tar:
+            return [m.name for m in tar if m.isfile()]
+
+    @property
+    def random_access(self) -> bool:
+        """
+        True for zips and uncompressed tars. A compressed tarball can only be
+        read front to back: every read() would decompress it from the start.
+        """
+        if self._zip:
+            return True
+        try:
+            with tarfile.open(self.archive_path, mode="r:"):
+                return True
+        except tarfile.ReadError:
+            return False
+
+    def read(self, member: str) -> bytes:
+        with self._lock:
+            if self._zip:
+                return self._zip.read(member)
+            if self._tar is None:
+                # Random access into a tar needs a seekable handle
+                self._tar = tarfile.open(self.archive_path, mode="r:*")
+            fp = self._tar.extractfile(member)
+            if fp is None:
+                raise KeyError(f"Not a regular file in archive: {member}")
+            return fp.read()
+
+    def iter_members(self, wanted=None) -> Iterator[tuple[str, bytes]]:
+        """
+        Yield (name, data) for every regular file in archive order.
+        If *wanted* is given, only members for which wanted(basename) is
+        true are read; the rest are skipped without decompressing into memory.
+        """
+        if self._zip:
+            for info in self._zip.infolist():
+                if info.is_dir():
+                    continue
+                if wanted and not wanted(posixpath.basename(info.filename)):
+                    continue
+                yield info.filename, self._zip.read(info)
+            return
+
+        with tarfile.open(self.archive_path, mode="r|*") as tar:
+            for member in tar:
+                if not member.isfile():
+                    continue
+                if wanted and not wanted(posixpath.basename(member.name)):
+                    continue
+                fp = tar.extractfile(member)
+                yield member.name, fp.read()
+
+
+class ArchiveWriter:
+    """
+    Write packed outputs into an uncompressed (stored) zip or plain tar.
+
+    PNG data is already deflated, so recompressing it only burns CPU; the
+    container just concatenates members into one file. The format follows the
+    extension: '.tar' writes a tarball, anything else a zip.
+    """
+
+    def __init__(self, archive_path: str):
+        self.archive_path = archive_path
+        self._zip: zipfile.ZipFile | None = None
+        self._tar: tarfile.TarFile | None = None
+        if archive_path.lower().endswith(".tar"):
+            self._tar = tarfile.open(archive_path, mode="w")
+        else:
+            self._zip = zipfile.ZipFile(archive_path, mode="w", compression=zipfile.ZIP_STORED)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._zip:
+            self._zip.close()
+        if self._tar:
+            self._tar.close()
+
+    def write(self, name: str, data: bytes):
+        if self._zip:
+            self._zip.writestr(name, data)
+            return
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        self._tar.addfile(info, io.BytesIO(data))
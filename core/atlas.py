@@ -0,0 +1,246 @@
+"""
+Texture-atlas output: many small ORM groups composed into shared pages.
+
+Groups are placed with MaxRects (best-short-side-fit) bin packing, using
+the sizes from the planning scan's header read. Each group's sources are
+then decoded and merged once, pasted straight into its page in memory,
+and the pages are written as <name>_<n>_ORM.png next to a JSON manifest:
+
+    {
+      "origin": "top-left",
+      "pages": [{"file": "props_0_ORM.png", "width": 2048, "height": 1024}],
+      "textures": {
+        "crate": {"page": 0, "x": 2, "y": 2, "width": 512, "height": 512,
+                  "uv": [0.0009, 0.0019, 0.2509, 0.5019]}
+      }
+    }
+
+uv is [u_min, v_min, u_max, v_max] with v measured from the top of the
+page; engines with a bottom-left origin (OpenGL, Unity) use 1 - v.
+Every rect is surrounded by *padding* pixels of its own edge colour so
+mipmaps and bilinear filtering do not bleed neighbours into each other.
+"""
+import json
+import os
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+
+from PIL import Image
+
+from core.library import pack_images
+from core.png_writer import save_png
+from core.verify import output_record
+
+
+@dataclass(frozen=True)
+class AtlasPlacement:
+    base: str
+    page: int
+    x: int          # top-left of the texture itself, inside its padding
+    y: int
+    width: int
+    height: int
+
+
+@dataclass
+class AtlasPage:
+    width: int
+    height: int
+    placements: list[AtlasPlacement] = field(default_factory=list)
+
+
+class MaxRectsBin:
+    """One page's free space as a list of maximal free rectangles."""
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.free: list[tuple[int, int, int, int]] = [(0, 0, width, height)]
+
+    def insert(self, width: int, height: int) -> tuple[int, int] | None:
+        """Place a width x height rect; returns its (x, y) or None if it does not fit."""
+        best = None
+        for fx, fy, fw, fh in self.free:
+            if width <= fw and height <= fh:
+                short, long = sorted((fw - width, fh - height))
+                if best is None or (short, long) < best[0]:
+                    best = ((short, long), fx, fy)
+        if best is None:
+            return None
+
+        _fit, x, y = best
+        self._split(x, y, width, height)
+        return x, y
+
+    def _split(self, x: int, y: int, w: int, h: int):
+        pieces = []
+        for fx, fy, fw, fh in self.free:
+            if x >= fx + fw or x + w <= fx or y >= fy + fh or y + h <= fy:
+                pieces.append((fx, fy, fw, fh))
+                continue
+            # Up to four maximal pieces of this free rect around the new one
+            if x > fx:
+                pieces.append((fx, fy, x - fx, fh))
+            if x + w < fx + fw:
+                pieces.append((x + w, fy, fx + fw - x - w, fh))
+            if y > fy:
+                pieces.append((fx, fy, fw, y - fy))
+            if y + h < fy + fh:
+                pieces.append((fx, y + h, fw, fy + fh - y - h))
+
+        # Drop pieces contained in another one (keeping one of equal pairs)
+        pieces = list(dict.fromkeys(pieces))
+        self.free = [
+            r for r in pieces
+            if not any(o != r and _contains(o, r) for o in pieces)
+        ]
+
+
+def _contains(outer, inner) -> bool:
+    ox, oy, ow, oh = outer
+    ix, iy, iw, ih = inner
+    return ox <= ix and oy <= iy and ix + iw <= ox + ow and iy + ih <= oy + oh
+
+
+def _next_pow2(n: int) -> int:
+    return 1 << max(0, n - 1).bit_length()
+
+
+def plan_atlas(
+    sizes: dict[str, tuple[int, int]],
+    page_size: int = 2048,
+    padding: int = 2,
+    power_of_two: bool = True,
+) -> list[AtlasPage]:
+    """
+    Place every base of *sizes* (base → (w, h)) on as few pages as
+    possible, largest first. Each page is then trimmed to its used area
+    (rounded up to a power of two when *power_of_two*). Raises ValueError
+    for textures that cannot fit an empty page.
+    """
+    too_big = [b for b, (w, h) in sizes.items() if w + 2 * padding > page_size or h + 2 * padding > page_size]
+    if too_big:
+        raise ValueError(
+            f"{len(too_big)} texture(s) larger than a {page_size}px page: {', '.join(sorted(too_big))}"
+        )
+
+    order = sorted(sizes, key=lambda b: (max(sizes[b]), sizes[b][0] * sizes[b][1], b), reverse=True)
+    bins: list[MaxRectsBin] = []
+    pages: list[AtlasPage] = []
+
+    for base in order:
+        w, h = sizes[base]
+        for index, bin_ in enumerate(bins):
+            spot = bin_.insert(w + 2 * padding, h + 2 * padding)
+            if spot:
+                break
+        else:
+            bins.append(MaxRectsBin(page_size, page_size))
+            pages.append(AtlasPage(page_size, page_size))
+            index = len(bins) - 1
+            spot = bins[index].insert(w + 2 * padding, h + 2 * padding)
+        pages[index].placements.append(
+            AtlasPlacement(base, index, spot[0] + padding, spot[1] + padding, w, h)
+        )
+
+    for page in pages:
+        used_w = max(p.x + p.width + padding for p in page.placements)
+        used_h = max(p.y + p.height + padding for p in page.placements)
+        if power_of_two:
+            used_w, used_h = _next_pow2(used_w), _next_pow2(used_h)
+        page.width, page.height = min(used_w, page_size), min(used_h, page_size)
+    return pages
+
+
+def build_atlas(
+    textures: dict[str, dict[str, str]],
+    sizes: dict[str, tuple[int, int]],
+    suffixes: dict[str, str],
+    output_folder: str,
+    name: str = "atlas",
+    page_size: int = 2048,
+    padding: int = 2,
+    power_of_two: bool = True,
+    max_workers: int | None = None,
+    log_callback: Callable[[str], None] = print,
+) -> tuple[str, int]:
+    """
+    Compose the complete groups of *textures* into atlas pages.
+
+    *sizes* comes from the planning scan (PlannedGroup.width / height).
+    Groups are decoded and merged on a thread pool and pasted into their
+    page as they arrive; nothing is written per group. Returns
+    (manifest_path, number of groups placed). Groups too large for a page
+    are skipped with a warning, like groups that fail to decode.
+    """
+    keys = [suffixes[t].lower() for t in ('ao', 'roughness', 'metallic')]
+    sizes = dict(sizes)
+    for base, (w, h) in sorted(sizes.items()):
+        if w + 2 * padding > page_size or h + 2 * padding > page_size:
+            log_callback(f"⚠️ Skipping '{base}': {w}x{h} plus padding does not fit a {page_size}px page")
+            del sizes[base]
+    pages = plan_atlas(sizes, page_size, padding, power_of_two)
+    log_callback(f"🗺️ {len(sizes)} texture(s) on {len(pages)} page(s) of up to {page_size}px")
+
+    manifest = {"origin": "top-left", "pages": [], "textures": {}}
+    placed = 0
+
+    with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count() or 1) as pool:
+        for index, page in enumerate(pages):
+            canvas = Image.new("RGB", (page.width, page.height))
+            futures = {
+                pool.submit(pack_images, *(textures[p.base][k] for k in keys)): p
+                for p in page.placements
+            }
+            for future in as_completed(futures):
+                p = futures[future]
+                try:
+                    orm_img = future.result()
+                    if orm_img.size != (p.width, p.height):
+                        raise ValueError(f"size changed since planning: {orm_img.size}")
+                except Exception as e:
+                    log_callback(f"⚠️ Error in '{p.base}': {e}")
+                    continue
+                _paste_padded(canvas, orm_img, p.x, p.y, padding)
+                del orm_img
+                placed += 1
+                manifest["textures"][p.base] = {
+                    "page": index, "x": p.x, "y": p.y, "width": p.width, "height": p.height,
+                    "uv": [
+                        round(p.x / page.width, 6), round(p.y / page.height, 6),
+                        round((p.x + p.width) / page.width, 6), round((p.y + p.height) / page.height, 6),
+                    ],
+                }
+
+            file_name = f"{name}_{index}_ORM.png"
+            save_png(canvas, os.path.join(output_folder, file_name), parallel=True,
+                     text=output_record(canvas, []))
+            manifest["pages"].append({"file": file_name, "width": page.width, "height": page.height})
+            log_callback(f"✅ Wrote <b>{file_name}</b> ({page.width}x{page.height}, "
+                         f"{len(page.placements)} texture(s))")
+
+    manifest_path = os.path.join(output_folder, f"{name}.json")
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest_path, placed
+
+
+def _paste_padded(canvas: Image.Image, img: Image.Image, x: int, y: int, padding: int):
+    """Paste *img* at (x, y) with its edge rows / columns repeated into the padding."""
+    canvas.paste(img, (x, y))
+    if not padding:
+        return
+    w, h = img.size
+    edges = [
+        ((0, 0, w, 1), (x, y - padding, x + w, y)),                                  # top
+        ((0, h - 1, w, h), (x, y + h, x + w, y + h + padding)),                      # bottom
+        ((0, 0, 1, h), (x - padding, y, x, y + h)),                                  # left
+        ((w - 1, 0, w, h), (x + w, y, x + w + padding, y + h)),                      # right
+        ((0, 0, 1, 1), (x - padding, y - padding, x, y)),                            # corners
+        ((w - 1, 0, w, 1), (x + w, y - padding, x + w + padding, y)),
+        ((0, h - 1, 1, h), (x - padding, y + h, x, y + h + padding)),
+        ((w - 1, h - 1, w, h), (x + w, y + h, x + w + padding, y + h + padding)),
+    ]
+    for src, (l, t, r, b) in edges:
+        canvas.paste(img.crop(src).resize((r - l, b - t), Image.NEAREST), (l, t))
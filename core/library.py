@@ -0,0 +1,169 @@
+"""
+In-memory packing API for embedding the packer in other Python tools.
+
+Nothing here touches the output folder: sources can be file paths, bytes,
+binary file-like objects, PIL images or array-likes (anything exposing
+__array_interface__, e.g. numpy arrays), and results come back as a PIL
+image or encoded bytes.
+
+    from core.library import pack_images, pack_to_bytes, pack_many
+
+    orm = pack_images(ao_bytes, rough_pil, metal_array)
+    png = pack_to_bytes("rock_AO.png", "rock_R.png", "rock_M.png")
+
+    for key, result in pack_many(groups):
+        ...
+"""
+import io
+import os
+from collections.abc import Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any
+
+from PIL import Image
+
+from core.source_descriptor import load_sources
+
+TextureSource = Any  # str | os.PathLike | bytes | BinaryIO | Image.Image | array-like
+
+
+def _open(source: TextureSource) -> Image.Image:
+    if isinstance(source, Image.Image):
+        return source
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return Image.open(io.BytesIO(source))
+    if isinstance(source, (str, os.PathLike)) or hasattr(source, "read"):
+        return Image.open(source)
+    if hasattr(source, "__array_interface__"):
+        return Image.fromarray(source)
+    raise TypeError(f"Unsupported texture source: {type(source).__name__}")
+
+
+def load_channel(source: TextureSource) -> Image.Image:
+    """Decode *source* into a single-channel ('L') image."""
+    img = _open(source)
+    return img if img.mode == "L" else img.convert("L")
+
+
+def load_rgb(source: TextureSource) -> Image.Image:
+    """Decode *source* into an RGB image (e.g. a packed ORM texture)."""
+    img = _open(source)
+    return img if img.mode == "RGB" else img.convert("RGB")
+
+
+def load_channels(sources: list[TextureSource], concurrent: bool = False) -> list[Image.Image]:
+    """
+    load_channel for several sources at once.
+
+    With *concurrent* each distinct source is decoded on its own thread.
+    Pillow releases the GIL inside its decoders, so the decodes overlap and
+    the wall time approaches that of the slowest single source — at the cost
+    of holding all decoded sources in memory at the same time. On a
+    single-core machine there is nothing to overlap, so it decodes serially.
+    """
+    if not concurrent or len(sources) < 2 or (os.cpu_count() or 1) < 2:
+        return [load_channel(source) for source in sources]
+
+    def _decode(source):
+        img = load_channel(source)
+        img.load()
+        return img
+
+    # The same object passed twice (e.g. one PIL image for two channels) is
+    # decoded once; Pillow images must not be loaded from two threads
+    unique = {id(source): source for source in sources}
+    with ThreadPoolExecutor(max_workers=len(unique)) as pool:
+        decoded = dict(zip(unique, pool.map(_decode, unique.values())))
+    return [decoded[id(source)] for source in sources]
+
+
+def pack_images(
+    ao: TextureSource,
+    roughness: TextureSource,
+    metallic: TextureSource,
+    concurrent_decode: bool = False,
+) -> Image.Image:
+    """
+    Merge three sources into an RGB ORM image (R=AO, G=roughness, B=metallic).
+    String sources may be source descriptors (see core.source_descriptor);
+    refs into the same file are decoded once. With *concurrent_decode* the
+    three maps are decoded in parallel threads (see load_channels).
+    Raises ValueError if the sizes differ.
+    """
+    sources = load_sources([ao, roughness, metallic])
+    ao_img, rough_img, metal_img = load_channels(sources, concurrent_decode)
+
+    if ao_img.size != rough_img.size or ao_img.size != metal_img.size:
+        sizes = f"AO={ao_img.size} R={rough_img.size} M={metal_img.size}"
+        raise ValueError(f"Image sizes do not match: {sizes}")
+
+    return Image.merge("RGB", (ao_img, rough_img, metal_img))
+
+
+def encode_image(img: Image.Image, format: str = "PNG", **save_kwargs) -> bytes:
+    """Encode *img* into bytes; PNGs default to optimize=True like the packer."""
+    if format.upper() == "PNG":
+        save_kwargs.setdefault("optimize", True)
+    buffer = io.BytesIO()
+    img.save(buffer, format=format, **save_kwargs)
+    return buffer.getvalue()
+
+
+def pack_to_bytes(
+    ao: TextureSource,
+    roughness: TextureSource,
+    metallic: TextureSource,
+    format: str = "PNG",
+    **save_kwargs,
+) -> bytes:
+    """pack_images + encode_image in one call."""
+    return encode_image(pack_images(ao, roughness, metallic), format, **save_kwargs)
+
+
+def pack_many(
+    groups: Iterable[tuple[Any, TextureSource, TextureSource, TextureSource]],
+    max_workers: int | None = None,
+    encode: str | None = "PNG",
+) -> Iterator[tuple[Any, bytes | Image.Image | Exception]]:
+    """
+    Pack an iterable of (key, ao, roughness, metallic) groups concurrently.
+
+    Yields (key, result) in completion order, where result is the encoded
+    bytes (or the PIL image when *encode* is None) or the exception raised
+    for that group — one bad group does not stop the batch.
+
+    Threads are used rather than processes because Pillow releases the GIL
+    while decoding and encoding, and in-memory sources would otherwise have
+    to be pickled across process boundaries. *groups* is consumed lazily, with
+    at most 2 × max_workers groups held in memory at a time.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+
+    def _one(ao, roughness, metallic):
+        img = pack_images(ao, roughness, metallic)
+        return encode_image(img, encode) if encode else img
+
+    group_iter = iter(groups)
+    in_flight = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while True:
+            # --- Top up the window ---
+            while len(in_flight) < max_workers * 2:
+                group = next(group_iter, None)
+                if group is None:
+                    break
+                key, ao, roughness, metallic = group
+                in_flight[pool.submit(_one, ao, roughness, metallic)] = key
+
+            if not in_flight:
+                return
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                key = in_flight.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = e
+                yield key, result
@@ -0,0 +1,75 @@
+"""
+Thin client for core.pack_service.
+
+Standard library only, so pipeline scripts can submit to a running service
+without importing Pillow:
+
+    client = PackClient("http://127.0.0.1:8765")
+    reply = client.pack_group("rock", maps, "/out", suffixes)
+    for result in reply["results"]:
+        print(result["base"], result["ok"], result["timings"]["total_ms"])
+"""
+import json
+import urllib.error
+import urllib.request
+
+DEFAULT_PORT = 8765
+DEFAULT_URL = f"http://127.0.0.1:{DEFAULT_PORT}"
+
+
+class PackServiceError(RuntimeError):
+    """The service could not be reached or rejected the request."""
+
+
+class PackClient:
+    def __init__(self, url: str = DEFAULT_URL, timeout: float | None = None):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def _call(self, method: str, path: str, body: dict | None = None) -> dict:
+        data = json.dumps(body).encode("utf-8") if body is not None else None
+        request = urllib.request.Request(
+            self.url + path, data=data, method=method,
+            headers={"Content-Type": "application/json"},
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            try:
+                error = json.loads(e.read()).get("error", e.reason)
+            except ValueError:
+                error = e.reason
+            raise PackServiceError(f"{self.url}{path}: {error}") from e
+        except (urllib.error.URLError, OSError) as e:
+            raise PackServiceError(f"Packer service at {self.url} is not reachable: {getattr(e, 'reason', e)}") from e
+
+    def status(self) -> dict:
+        return self._call("GET", "/status")
+
+    def pack_group(
+        self,
+        base: str,
+        maps: dict[str, str],
+        output_folder: str,
+        suffixes: dict[str, str],
+    ) -> dict:
+        """Pack one group; *maps* uses find_textures' lowercased suffix keys."""
+        return self._call("POST", "/pack", {
+            "base": base, "maps": maps, "output_folder": output_folder, "suffixes": suffixes,
+        })
+
+    def pack_folder(
+        self,
+        folder: str,
+        suffixes: dict[str, str],
+        output_folder: str | None = None,
+    ) -> dict:
+        """Pack every complete group in *folder* (scanned by the service)."""
+        body = {"folder": folder, "suffixes": suffixes}
+        if output_folder:
+            body["output_folder"] = output_folder
+        return self._call("POST", "/pack", body)
+
+    def shutdown(self) -> dict:
+        return self._call("POST", "/shutdown")
@@ -0,0 +1,243 @@
+import io
+import os
+import posixpath
+from dataclasses import dataclass
+
+from PIL import Image
+
+from core.archive_io import ArchiveReader, default_output_archive, is_archive, member_ref, split_member_ref
+from core.texture_packer import TexturePackerCore
+from core.udim import group_tiles, validate_tile_set
+
+
+@dataclass(frozen=True)
+class PlannedGroup:
+    """One texture group as seen by the planning scan."""
+    base: str
+    sources: tuple[tuple[str, str], ...]    # (lowercased suffix key, path) pairs
+    missing: tuple[str, ...]                # suffix keys with no file
+    output_path: str
+    width: int = 0                          # largest source size; 0 if unknown
+    height: int = 0
+    up_to_date: bool = False                # output newer than every source
+
+    @property
+    def maps(self) -> dict[str, str]:
+        """find_textures-style map dict (a fresh copy each call)."""
+        return dict(self.sources)
+
+    @property
+    def complete(self) -> bool:
+        return not self.missing
+
+    @property
+    def pixels(self) -> int:
+        return self.width * self.height
+
+
+@dataclass(frozen=True)
+class PackPlan:
+    """
+    Immutable result of scanning a folder once.
+
+    Everything that used to list the folder on its own — the worker's
+    diagnostics, find_textures, FileCleaner — can work from this instead,
+    so a run costs a single directory scan even on large or remote folders.
+    """
+    folder: str
+    suffixes: tuple[tuple[str, str], ...]
+    file_names: tuple[str, ...]             # regular files, in scan order
+    subdir_count: int
+    groups: tuple[PlannedGroup, ...] = ()
+
+    @property
+    def entry_count(self) -> int:
+        return len(self.file_names) + self.subdir_count
+
+    def textures(self) -> dict[str, dict[str, str]]:
+        """The same shape TexturePackerCore.find_textures returns."""
+        return {g.base: g.maps for g in self.groups}
+
+    @staticmethod
+    def build(
+        folder: str,
+        suffixes: dict[str, str],
+        read_headers: bool = True,
+        output: str | None = None,
+    ) -> "PackPlan":
+        """
+        Scan *folder* (or a zip/tar bundle) once and plan the run.
+
+        *output* is where the outputs go: a folder, or a .zip / .tar to store
+        them in (default: *folder* itself, or <bundle>_ORM.zip for a bundle).
+        Predicted output paths and the up-to-date check refer to it.
+
+        os.scandir gives file/dir type from the directory listing itself, so
+        no per-entry isfile() call is needed; only matched sources and their
+        predicted outputs are stat'ed, for the up-to-date check. With
+        *read_headers* each complete group's source headers are parsed
+        (no pixel decoding) to estimate its size; tiles of UDIM / UV-tile
+        sets always are, for validate_tile_set.
+        """
+        match = TexturePackerCore._build_matcher(suffixes)
+        required = [s.lower() for s in suffixes.values()]
+
+        file_names: list[str] = []
+        subdir_count = 0
+        dir_entries: dict[str, os.DirEntry] = {}
+        found: dict[str, dict[str, str]] = {}
+
+        bundle = is_archive(folder)
+        if bundle:
+            for name, full_path in TexturePackerCore._list_entries(folder):
+                file_names.append(name)
+                hit = match(name) if match else None
+                if hit:
+                    found.setdefault(hit[0], {})[hit[1]] = full_path
+        else:
+            with os.scandir(folder) as it:
+                for entry in it:
+                    if entry.is_dir():
+                        subdir_count += 1
+                        continue
+                    if not entry.is_file():
+                        continue
+                    file_names.append(entry.name)
+                    dir_entries[entry.name] = entry
+                    hit = match(entry.name) if match else None
+                    if hit:
+                        found.setdefault(hit[0], {})[hit[1]] = entry.path
+
+        if output is None:
+            output = default_output_archive(folder) if bundle else folder
+        # Same test cmd_pack uses to pick an ArchiveWriter
+        output_archive = output.lower().endswith((".zip", ".tar"))
+        output_in_folder = not bundle and not output_archive and os.path.abspath(output) == os.path.abspath(folder)
+
+        def _mtime(name: str) -> float | None:
+            entry = dir_entries.get(name)
+            if entry is None:
+                return None
+            try:
+                return entry.stat().st_mtime
+            except OSError:
+                return None
+
+        def _output_mtime(out_name: str) -> float | None:
+            # Outputs inside an archive are never considered up to date
+            if output_archive:
+                return None
+            if output_in_folder:
+                return _mtime(out_name)
+            try:
+                return os.stat(os.path.join(output, out_name)).st_mtime
+            except OSError:
+                return None
+
+        # Tile sets are always validated with their sizes (mixed-resolution
+        # warning), whatever mode the run is in
+        tile_bases = {b for tile_set in group_tiles(found).values() for b in tile_set.bases}
+
+        # Archive members are read in one streaming pass for all groups;
+        # opening each member on its own would decompress a tarball again
+        # for every source
+        archive_sizes: dict[str, tuple[int, int]] = {}
+        if bundle and (read_headers or tile_bases):
+            by_name = {
+                split_member_ref(path)[1]: path
+                for base, maps in found.items()
+                if (read_headers or base in tile_bases) and all(key in maps for key in required)
+                for path in maps.values()
+            }
+            wanted = {posixpath.basename(name) for name in by_name}
+            with ArchiveReader(folder) as reader:
+                for name, data in reader.iter_members(wanted.__contains__):
+                    if name not in by_name:
+                        continue
+                    try:
+                        with Image.open(io.BytesIO(data)) as img:
+                            archive_sizes[by_name[name]] = img.size
+                    except Exception:
+                        continue
+
+        groups = []
+        for base, maps in found.items():
+            missing = tuple(key for key in required if key not in maps)
+            out_name = f"{base}_ORM.png"
+            output_path = member_ref(output, out_name) if output_archive else os.path.join(output, out_name)
+
+            up_to_date = False
+            out_time = _output_mtime(out_name) if not missing else None
+            if out_time is not None:
+                source_times = [_mtime(os.path.basename(p)) for p in maps.values()]
+                up_to_date = None not in source_times and out_time >= max(source_times)
+
+            width = height = 0
+            if (read_headers or base in tile_bases) and not missing:
+                for path in maps.values():
+                    if bundle:
+                        if path not in archive_sizes:
+                            continue
+                        w, h = archive_sizes[path]
+                    else:
+                        try:
+                            with Image.open(path) as img:
+                                w, h = img.size
+                        except Exception:
+                            continue
+                    if w * h > width * height:
+                        width, height = w, h
+
+            groups.append(PlannedGroup(
+                base=base,
+                sources=tuple(maps.items()),
+                missing=missing,
+                output_path=output_path,
+                width=width,
+                height=height,
+                up_to_date=up_to_date,
+            ))
+
+        return PackPlan(
+            folder=folder,
+            suffixes=tuple(suffixes.items()),
+            file_names=tuple(file_names),
+            subdir_count=subdir_count,
+            groups=tuple(groups),
+        )
+
+    def report(self) -> list[str]:
+        """Human-readable dry-run report, one line per entry."""
+        lines = [
+            f"📂 {self.folder}: {len(self.file_names)} file(s), {self.subdir_count} subdirectories, "
+            f"{len(self.groups)} group(s)"
+        ]
+        total_pixels = 0
+        for g in sorted(self.groups, key=lambda g: g.base):
+            if g.missing:
+                lines.append(f"⚠️ {g.base}: missing {', '.join(g.missing)} — would be skipped")
+                continue
+            total_pixels += g.pixels
+            size = f"{g.width}x{g.height}" if g.pixels else "size unknown"
+            state = "up to date" if g.up_to_date else "would pack"
+            lines.append(f"{'✔️' if g.up_to_date else '➡️'} {g.base} ({size}) → {g.output_path} [{state}]")
+
+        textures = self.textures()
+        sizes = {g.base: (g.width, g.height) for g in self.groups if g.pixels}
+        for name, tile_set in sorted(group_tiles(textures).items()):
+            errors, warnings = validate_tile_set(tile_set, textures, dict(self.suffixes), sizes)
+            line = f"🧩 {name}: {len(tile_set.tiles)} tile(s) ({tile_set.tile_range})"
+            if errors:
+                line += f" — {'; '.join(errors)}, whole set would be skipped"
+            elif warnings:
+                line += f" — {'; '.join(warnings)}"
+            lines.append(line)
+
+        complete = [g for g in self.groups if g.complete]
+        stale = [g for g in complete if not g.up_to_date]
+        lines.append(
+            f"🧮 {len(complete)} complete group(s), {len(stale)} to (re)pack, "
+            f"{len(self.groups) - len(complete)} incomplete, "
+            f"{total_pixels / 1_000_000:.1f} MPix total"
+        )
+        return lines
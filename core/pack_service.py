@@ -0,0 +1,292 @@
+"""
+Long-running packer service for pipelines that pack one asset at a time.
+
+Starting the CLI costs an interpreter, a Pillow import and (with --workers)
+a fresh process pool for every call. The service pays that once and then
+takes requests over localhost HTTP with a small JSON protocol:
+
+    POST /pack      {"base", "maps", "output_folder", "suffixes"}   one group
+    POST /pack      {"folder", "suffixes"[, "output_folder"]}       a whole folder
+    GET  /status    uptime, request count, cache statistics
+    POST /shutdown
+
+Every reply is a JSON object with "ok" and, for /pack, a "results" list
+with one entry per group: base, ok, message and timings in ms (queue,
+decode, pack, total). core.pack_client wraps this for thin clients.
+
+Groups run on a warm thread pool (Pillow releases the GIL while decoding
+and encoding), which lets all workers share one cache of decoded L planes
+keyed by (source, mtime, size): an asset re-packed while iterating on one
+of its maps only decodes the map that changed.
+
+There is no authentication and requests may read and write any path the
+service user can, so it refuses to bind to anything but a loopback
+interface unless explicitly told to (allow_remote).
+"""
+import ipaddress
+import json
+import os
+import socket
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from PIL import Image
+
+from core.archive_io import require_random_access, split_member_ref
+from core.library import load_channel
+from core.pack_client import DEFAULT_PORT
+from core.pack_plan import PackPlan
+from core.source_descriptor import SourceRef, load_sources
+from core.texture_packer import TexturePackerCore
+
+
+class DecodedMapCache:
+    """Thread-safe LRU of decoded single-channel planes, bounded in bytes."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._items: OrderedDict[tuple, Image.Image] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(source: str) -> tuple | None:
+        # Stat the file on disk: the archive for member refs, the file itself
+        # for paths and descriptors. Unstat-able sources are not cached.
+        path = SourceRef.parse(source).path
+        member = split_member_ref(path)
+        try:
+            st = os.stat(member[0] if member else path)
+        except OSError:
+            return None
+        return source, st.st_mtime_ns, st.st_size
+
+    def plane(self, source: str) -> Image.Image:
+        """Return *source* decoded to 'L', from the cache when still fresh."""
+        key = self._key(source)
+        if key is not None:
+            with self._lock:
+                img = self._items.get(key)
+                if img is not None:
+                    self._items.move_to_end(key)
+                    self.hits += 1
+                    return img
+
+        img = load_channel(load_sources([source])[0])
+        img.load()
+
+        with self._lock:
+            self.misses += 1
+            if key is not None and key not in self._items:
+                self._items[key] = img
+                self._bytes += img.width * img.height
+                while self._bytes > self.max_bytes and len(self._items) > 1:
+                    _key, old = self._items.popitem(last=False)
+                    self._bytes -= old.width * old.height
+        return img
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._items),
+                "mb": round(self._bytes / (1024 * 1024), 1),
+                "max_mb": round(self.max_bytes / (1024 * 1024), 1),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+def is_loopback(host: str) -> bool:
+    """True if every address *host* resolves to is a loopback address."""
+    try:
+        infos = socket.getaddrinfo(host, None)
+    except OSError:
+        return False
+    return bool(infos) and all(ipaddress.ip_address(info[4][0]).is_loopback for info in infos)
+
+
+class PackService:
+    """Warm thread pool + decoded-map cache behind a localhost HTTP server."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = DEFAULT_PORT,
+        max_workers: int | None = None,
+        cache_mb: int = 1024,
+        allow_remote: bool = False,
+    ):
+        if not allow_remote and not is_loopback(host):
+            raise ValueError(
+                f"Refusing to expose the unauthenticated packer service on {host}; "
+                "bind to 127.0.0.1 or allow remote access explicitly"
+            )
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.cache = DecodedMapCache(cache_mb * 1024 * 1024)
+        self.pool = ThreadPoolExecutor(max_workers=self.max_workers)
+        self.started = time.time()
+        self.requests = 0
+        self._count_lock = threading.Lock()
+
+        self.server = ThreadingHTTPServer((host, port), _Handler)
+        self.server.daemon_threads = True
+        self.server.service = self
+
+    @property
+    def address(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def serve_forever(self):
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+            self.pool.shutdown(wait=True)
+
+    def shutdown(self):
+        # serve_forever() must be stopped from another thread than its own
+        threading.Thread(target=self.server.shutdown, daemon=True).start()
+
+    # ------------------------------------------------------------------ #
+    #  Requests                                                            #
+    # ------------------------------------------------------------------ #
+
+    def status(self) -> dict:
+        return {
+            "ok": True,
+            "uptime_s": round(time.time() - self.started, 1),
+            "requests": self.requests,
+            "workers": self.max_workers,
+            "cache": self.cache.stats(),
+        }
+
+    def pack(self, request: dict) -> dict:
+        """Handle a /pack body; see the module docstring for its two shapes."""
+        with self._count_lock:
+            self.requests += 1
+
+        suffixes = request.get("suffixes")
+        if (
+            not isinstance(suffixes, dict)
+            or set(suffixes) != {"ao", "roughness", "metallic"}
+            or not all(isinstance(v, str) for v in suffixes.values())
+        ):
+            raise ValueError("'suffixes' must map ao, roughness and metallic to a suffix")
+        for field in ("folder", "output_folder", "base"):
+            if request.get(field) is not None and not isinstance(request[field], str):
+                raise ValueError(f"'{field}' must be a string")
+        if "maps" in request and not (
+            isinstance(request["maps"], dict)
+            and all(isinstance(v, str) for v in request["maps"].values())
+        ):
+            raise ValueError("'maps' must map suffix keys to source paths")
+
+        if "folder" in request:
+            require_random_access(request["folder"])
+            plan = PackPlan.build(request["folder"], suffixes, read_headers=False)
+            output_folder = request.get("output_folder") or request["folder"]
+            groups = [(g.base, g.maps) for g in plan.groups if g.complete]
+            skipped = [
+                {"base": g.base, "ok": False, "message": f"missing {', '.join(g.missing)}"}
+                for g in plan.groups if g.missing
+            ]
+        else:
+            for field in ("base", "maps", "output_folder"):
+                if field not in request:
+                    raise ValueError(f"Missing '{field}'")
+            output_folder = request["output_folder"]
+            groups = [(request["base"], request["maps"])]
+            skipped = []
+
+        # A lone group (the usual single-asset call) spreads its PNG encode
+        # over all cores; several groups already keep the pool busy
+        parallel_encode = len(groups) == 1
+        submitted = time.perf_counter()
+        futures = [
+            self.pool.submit(
+                self._pack_group, base, maps, output_folder, suffixes, submitted, parallel_encode,
+            )
+            for base, maps in groups
+        ]
+        results = [f.result() for f in futures] + skipped
+        return {"ok": all(r["ok"] for r in results), "results": results}
+
+    def _pack_group(self, base, maps, output_folder, suffixes, submitted, parallel_encode) -> dict:
+        started = time.perf_counter()
+        try:
+            # Swap every source for its cached plane; process_texture passes
+            # PIL images straight through, so merge/save behave as usual
+            planes = {key: self.cache.plane(source) for key, source in maps.items()}
+            decoded = time.perf_counter()
+            ok, message = TexturePackerCore.process_texture(
+                base, planes, output_folder, suffixes, parallel_encode=parallel_encode,
+                record_sources=[maps.get(suffixes[t].lower()) for t in ('ao', 'roughness', 'metallic')],
+            )
+        except Exception as e:
+            decoded = time.perf_counter()
+            ok, message = False, str(e)
+        finished = time.perf_counter()
+
+        return {
+            "base": base,
+            "ok": ok,
+            "message": message,
+            "timings": {
+                "queue_ms": round((started - submitted) * 1000, 1),
+                "decode_ms": round((decoded - started) * 1000, 1),
+                "pack_ms": round((finished - decoded) * 1000, 1),
+                "total_ms": round((finished - submitted) * 1000, 1),
+            },
+        }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "ORMPackerService/1"
+
+    def do_GET(self):
+        if self.path == "/status":
+            self._reply(200, self.server.service.status())
+        else:
+            self._reply(404, {"ok": False, "error": f"Unknown endpoint {self.path}"})
+
+    def do_POST(self):
+        service: PackService = self.server.service
+        if self.path == "/shutdown":
+            self._reply(200, {"ok": True})
+            service.shutdown()
+            return
+        if self.path != "/pack":
+            self._reply(404, {"ok": False, "error": f"Unknown endpoint {self.path}"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(request, dict):
+                raise ValueError("Request body must be a JSON object")
+            reply = service.pack(request)
+        except (ValueError, OSError) as e:
+            self._reply(400, {"ok": False, "error": str(e)})
+            return
+        except Exception as e:
+            # Anything else still gets a JSON reply instead of a dropped socket
+            self._reply(500, {"ok": False, "error": f"{type(e).__name__}: {e}"})
+            return
+        self._reply(200, reply)
+
+    def _reply(self, status: int, body: dict):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass  # one line per request would drown the service's own output
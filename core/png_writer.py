@@ -0,0 +1,182 @@
+"""
+Multi-threaded PNG writer for single large outputs.
+
+Pillow compresses a PNG on one core, which dominates the time of an 8K or
+16K pack and cannot be spread across the process pool (there is only one
+image). write_png splits the image into horizontal bands and, pigz-style:
+
+  1. filters each band on its own thread — every band gets the None / Sub /
+     Up / Average filter whose output has the smallest sum of absolute
+     values (the usual PNG heuristic, evaluated per band instead of per row,
+     so it can be done with whole-image Pillow operations);
+  2. deflates each band on its own thread as a raw stream primed with the
+     last 32 KiB of the previous band (zdict), ending every band but the
+     last with Z_SYNC_FLUSH so the pieces concatenate into one valid stream;
+  3. stitches the pieces into a zlib stream (header + Adler-32) and writes
+     it as IDAT chunks.
+
+zlib and Pillow's image operations release the GIL, so threads scale with
+cores. The output decodes to exactly the same pixels as Pillow's own PNG.
+"""
+import os
+import struct
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image, ImageChops, ImageStat
+from PIL.PngImagePlugin import PngInfo
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# Images below this size are left to Pillow: threading them does not pay
+PARALLEL_MIN_PIXELS = 2048 * 2048
+
+_COLOR_TYPES = {"L": 0, "RGB": 2, "RGBA": 6}
+_WINDOW = 32 * 1024
+_BAND_BYTES = 1024 * 1024      # raw bytes per band, rounded to whole rows
+_MAX_IDAT = 1 << 30
+
+# Signed magnitude of a filtered byte, for the filter heuristic
+_ABS_LUT = [min(v, 256 - v) for v in range(256)]
+
+
+def save_png(
+    img: Image.Image,
+    fp,
+    parallel: bool = False,
+    workers: int | None = None,
+    text: dict[str, str] | None = None,
+):
+    """
+    Save *img* as PNG to a path or binary file, with optional tEXt chunks.
+
+    With *parallel*, large L/RGB/RGBA images go through write_png; anything
+    else (or a single-core machine) uses Pillow with optimize=True as before.
+    """
+    workers = workers or os.cpu_count() or 1
+    if (
+        parallel
+        and workers > 1
+        and img.mode in _COLOR_TYPES
+        and img.width * img.height >= PARALLEL_MIN_PIXELS
+    ):
+        write_png(img, fp, workers=workers, text=text)
+    else:
+        info = None
+        if text:
+            info = PngInfo()
+            for key, value in text.items():
+                info.add_text(key, value)
+        img.save(fp, format="PNG", optimize=True, pnginfo=info)
+
+
+def write_png(
+    img: Image.Image,
+    fp,
+    workers: int | None = None,
+    level: int = 9,
+    text: dict[str, str] | None = None,
+):
+    """Write *img* (mode L, RGB or RGBA) as PNG using *workers* threads."""
+    if img.mode not in _COLOR_TYPES:
+        raise ValueError(f"write_png supports L, RGB and RGBA images, not {img.mode}")
+    img.load()
+    width, height = img.size
+    stride = width * len(img.getbands())
+    rows_per_band = max(1, _BAND_BYTES // stride)
+    bands = [(y, min(y + rows_per_band, height)) for y in range(0, height, rows_per_band)]
+
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        filtered = list(pool.map(lambda band: _filter_band(img, *band), bands))
+        last = len(filtered) - 1
+        compressed = list(pool.map(
+            lambda i: _deflate(filtered[i], filtered[i - 1] if i else None, level, i == last),
+            range(len(filtered)),
+        ))
+
+    adler = 1
+    for data in filtered:
+        adler = zlib.adler32(data, adler)
+    del filtered
+
+    ihdr = struct.pack(">IIBBBBB", width, height, 8, _COLOR_TYPES[img.mode], 0, 0, 0)
+    pieces = [_zlib_header(level), *compressed, struct.pack(">I", adler)]
+    texts = [
+        key.encode("latin-1") + b"\0" + value.encode("latin-1")
+        for key, value in (text or {}).items()
+    ]
+
+    if isinstance(fp, (str, os.PathLike)):
+        with open(fp, "wb") as f:
+            _write_chunks(f, ihdr, texts, pieces)
+    else:
+        _write_chunks(fp, ihdr, texts, pieces)
+
+
+def _filter_band(img: Image.Image, y0: int, y1: int) -> bytes:
+    """Filtered scanlines (filter byte + row) for rows y0..y1 of *img*."""
+    # One row of context above the band for the Up / Average filters
+    top = max(y0 - 1, 0)
+    block = img.crop((0, top, img.width, y1))
+    skip = y0 - top
+
+    zero = Image.new(img.mode, block.size)
+    up = zero.copy()
+    up.paste(block.crop((0, 0, block.width, block.height - 1)), (0, 1))
+    left = zero.copy()
+    left.paste(block.crop((0, 0, block.width - 1, block.height)), (1, 0))
+    average = ImageChops.add(left, up, scale=2.0)
+
+    candidates = {
+        0: block,
+        1: ImageChops.subtract_modulo(block, left),
+        2: ImageChops.subtract_modulo(block, up),
+        3: ImageChops.subtract_modulo(block, average),
+    }
+    body = (0, skip, block.width, block.height)
+    lut = _ABS_LUT * len(img.getbands())
+
+    def cost(candidate: Image.Image) -> float:
+        return sum(ImageStat.Stat(candidate.crop(body).point(lut)).sum)
+
+    filter_type = min(candidates, key=lambda f: cost(candidates[f]))
+    raw = candidates[filter_type].crop(body).tobytes()
+
+    stride = len(raw) // (y1 - y0)
+    tag = bytes((filter_type,))
+    return b"".join(tag + raw[i:i + stride] for i in range(0, len(raw), stride))
+
+
+def _deflate(data: bytes, previous: bytes | None, level: int, last: bool) -> bytes:
+    if previous:
+        c = zlib.compressobj(level, zlib.DEFLATED, -15, 9, zlib.Z_DEFAULT_STRATEGY,
+                             zdict=previous[-_WINDOW:])
+    else:
+        c = zlib.compressobj(level, zlib.DEFLATED, -15, 9)
+    return c.compress(data) + c.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+
+def _zlib_header(level: int) -> bytes:
+    cmf = 0x78  # deflate, 32 KiB window
+    flevel = 0 if level < 2 else 1 if level < 6 else 2 if level == 6 else 3
+    flg = flevel << 6
+    flg += 31 - ((cmf << 8) + flg) % 31
+    return bytes((cmf, flg))
+
+
+def _write_chunks(f, ihdr: bytes, texts: list[bytes], pieces: list[bytes]):
+    f.write(PNG_SIGNATURE)
+    _write_chunk(f, b"IHDR", ihdr)
+    for data in texts:
+        _write_chunk(f, b"tEXt", data)
+    for piece in pieces:
+        for i in range(0, len(piece), _MAX_IDAT):
+            _write_chunk(f, b"IDAT", piece[i:i + _MAX_IDAT])
+    _write_chunk(f, b"IEND", b"")
+
+
+def _write_chunk(f, kind: bytes, data: bytes):
+    f.write(struct.pack(">I", len(data)))
+    f.write(kind)
+    f.write(data)
+    f.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(kind))))
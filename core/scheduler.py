@@ -0,0 +1,234 @@
+import os
+import time
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+
+from PIL import Image
+
+from core.archive_io import open_source
+from core.png_writer import save_png
+from core.source_descriptor import SourceRef, load_sources
+from core.texture_packer import TexturePackerCore
+from core.verify import output_record
+
+
+@dataclass(frozen=True)
+class PackJob:
+    base: str
+    maps: dict[str, str]
+    width: int
+    height: int
+    est_bytes: int
+
+    @property
+    def pixels(self) -> int:
+        return self.width * self.height
+
+
+class PackScheduler:
+    """
+    Run pack jobs in parallel without exceeding a RAM budget.
+
+    Header dimensions are read up front (Image.open only parses the header),
+    so every job gets a peak-memory estimate before anything is decoded.
+    Jobs are admitted largest-first while the sum of in-flight estimates stays
+    within the budget; when a big job does not fit, smaller ones are used to
+    fill the gap. Jobs that would not fit even into an empty budget are
+    "spilled": they run one at a time in this process after the pool has shut
+    down, through the low-memory path below.
+    """
+
+    # Rough peak per output pixel while packing one group:
+    #   one decoded source (up to RGBA, 4 B) being converted to L,
+    #   three L planes (3 B), merged RGB (3 B), PNG encoder scratch (~2 B)
+    BYTES_PER_PIXEL = 12
+
+    def __init__(self, memory_budget_mb: int = 2048, max_workers: int | None = None):
+        self.memory_budget = memory_budget_mb * 1024 * 1024
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+    # ------------------------------------------------------------------ #
+    #  Planning                                                            #
+    # ------------------------------------------------------------------ #
+
+    @staticmethod
+    def read_header_size(path: str) -> tuple[int, int]:
+        # Descriptors (layer / page / channel) share the size of their file
+        with Image.open(open_source(SourceRef.parse(path).path)) as img:
+            return img.size
+
+    def plan(self, textures: dict[str, dict[str, str]], suffixes: dict[str, str]) -> list[PackJob]:
+        """
+        Turn complete texture groups into jobs sorted largest-first.
+        Groups with missing maps are left out; callers report those as before.
+        Unreadable headers get a size of 0 so process_texture can report the
+        real error.
+        """
+        required = [s.lower() for s in suffixes.values()]
+        jobs = []
+        for base, maps in textures.items():
+            if any(key not in maps for key in required):
+                continue
+            width = height = 0
+            for key in required:
+                try:
+                    w, h = self.read_header_size(maps[key])
+                except Exception:
+                    continue
+                if w * h > width * height:
+                    width, height = w, h
+            jobs.append(PackJob(base, maps, width, height, width * height * self.BYTES_PER_PIXEL))
+
+        jobs.sort(key=lambda j: j.est_bytes, reverse=True)
+        return jobs
+
+    def jobs_from_plan(self, plan) -> list[PackJob]:
+        """
+        Jobs for the complete groups of a PackPlan, largest-first.
+        Sizes come from the plan's header scan, so nothing is reopened here.
+        """
+        jobs = [
+            PackJob(g.base, g.maps, g.width, g.height, g.pixels * self.BYTES_PER_PIXEL)
+            for g in plan.groups
+            if g.complete
+        ]
+        jobs.sort(key=lambda j: j.est_bytes, reverse=True)
+        return jobs
+
+    def plan_unpack(self, packed: dict[str, str]) -> list[PackJob]:
+        """
+        Jobs for unpacking ORM files (see TexturePackerCore.find_packed_textures),
+        largest-first. Each job's maps hold the ORM path under the 'orm' key.
+        """
+        jobs = []
+        for base, orm_path in packed.items():
+            try:
+                width, height = self.read_header_size(orm_path)
+            except Exception:
+                width = height = 0
+            jobs.append(PackJob(base, {'orm': orm_path}, width, height,
+                                width * height * self.BYTES_PER_PIXEL))
+
+        jobs.sort(key=lambda j: j.est_bytes, reverse=True)
+        return jobs
+
+    # ------------------------------------------------------------------ #
+    #  Execution                                                           #
+    # ------------------------------------------------------------------ #
+
+    def run(
+        self,
+        jobs: list[PackJob],
+        output_folder: str,
+        suffixes: dict[str, str],
+        on_result: Callable[[PackJob, bool, str], None],
+        should_stop: Callable[[], bool] = lambda: False,
+        task: Callable[..., tuple[bool, str]] | None = None,
+    ):
+        """
+        Run *jobs* (as returned by plan), calling on_result as each one finishes.
+
+        *task* is called as task(base, maps, output_folder, suffixes) and must be
+        picklable; it defaults to TexturePackerCore.process_texture, whose
+        oversized jobs go through pack_low_memory. A custom task is used for
+        oversized jobs too, still one at a time.
+        """
+        pool_task = task or TexturePackerCore.process_texture
+        spill_task = task or self.pack_low_memory
+
+        pending = [j for j in jobs if j.est_bytes <= self.memory_budget]
+        spilled = [j for j in jobs if j.est_bytes > self.memory_budget]
+
+        if pending:
+            self._run_pool(pending, output_folder, suffixes, on_result, should_stop, pool_task)
+
+        # Oversized groups: alone, in-process, after pool workers are gone
+        for job in spilled:
+            if should_stop():
+                return
+            success, message = spill_task(job.base, job.maps, output_folder, suffixes)
+            on_result(job, success, message)
+
+    def _run_pool(self, pending, output_folder, suffixes, on_result, should_stop, task):
+        in_flight: dict[Future, PackJob] = {}
+        in_flight_bytes = 0
+
+        with ProcessPoolExecutor(max_workers=min(self.max_workers, len(pending))) as pool:
+            while pending or in_flight:
+                # --- Admit as much as fits, largest first ---
+                if not should_stop():
+                    i = 0
+                    while i < len(pending) and len(in_flight) < self.max_workers:
+                        job = pending[i]
+                        if in_flight_bytes + job.est_bytes <= self.memory_budget:
+                            future = pool.submit(
+                                task, job.base, job.maps, output_folder, suffixes,
+                            )
+                            in_flight[future] = job
+                            in_flight_bytes += job.est_bytes
+                            pending.pop(i)
+                        else:
+                            i += 1
+                elif not in_flight:
+                    return
+
+                if not in_flight:
+                    return
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job = in_flight.pop(future)
+                    in_flight_bytes -= job.est_bytes
+                    try:
+                        success, message = future.result()
+                    except Exception as e:
+                        success, message = False, str(e)
+                    on_result(job, success, message)
+
+    @staticmethod
+    def pack_low_memory(
+        base: str,
+        maps: dict[str, str],
+        output_folder: str,
+        suffixes: dict[str, str],
+    ) -> tuple[bool, str]:
+        """
+        Pack one oversized group while holding as little as possible.
+
+        Each source is decoded and reduced to a single L plane before the next
+        one is opened (grayscale sources are used as-is, without a converted
+        copy), and the planes are released as soon as the RGB output exists,
+        so only the output image and the encoder are alive during save().
+        """
+        try:
+            start_time = time.time()
+            planes = []
+            sources = []
+            for tex_type in ('ao', 'roughness', 'metallic'):
+                key = suffixes[tex_type].lower()
+                path = maps.get(key)
+                if not path:
+                    return False, f"Missing texture map(s): {key}"
+                sources.append(path)
+                src = load_sources([path])[0]
+                img = src if isinstance(src, Image.Image) else Image.open(src)
+                plane = img if img.mode == "L" else img.convert("L")
+                plane.load()
+                del img
+                if planes and plane.size != planes[0].size:
+                    sizes = ", ".join(str(p.size) for p in planes + [plane])
+                    return False, f"Image sizes do not match: {sizes}"
+                planes.append(plane)
+
+            orm_img = Image.merge("RGB", planes)
+            del planes
+
+            out_path = os.path.join(output_folder, f"{base}_ORM.png")
+            save_png(orm_img, out_path, text=output_record(orm_img, sources))
+
+            elapsed = time.time() - start_time
+            return True, f"Packed <b>{base}_ORM</b> in <b>{elapsed:.1f}s</b> (low-memory)"
+
+        except Exception as e:
+            return False, str(e)
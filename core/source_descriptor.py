@@ -0,0 +1,188 @@
+"""
+Source descriptors: point at one layer, page or channel inside a file.
+
+A descriptor is a plain string so it can sit anywhere a texture path can
+(find_textures-style map dicts, the work queue, the CLI):
+
+    hero.psd|layer=AO                PSD layer by name (or 1-based index)
+    hero_masks.tif|page=2            page of a multi-page TIFF (0-based)
+    hero_mask.png|channel=G          one channel of an RGB(A) image
+    hero_masks.tif|page=0|channel=R  combinations of the above
+
+'|' cannot appear in Windows file names, so it never collides with a path.
+"""
+import os
+from dataclasses import dataclass
+
+from PIL import Image
+
+from core.archive_io import open_source
+
+DESCRIPTOR_SEP = "|"
+
+
+@dataclass(frozen=True)
+class SourceRef:
+    path: str
+    layer: str | None = None        # PSD layer name, or 1-based index as text
+    page: int | None = None         # 0-based frame of a multi-page file
+    channel: str | None = None      # band name: 'R', 'G', 'B', 'A' or 'L'
+
+    @property
+    def has_selector(self) -> bool:
+        return self.layer is not None or self.page is not None or self.channel is not None
+
+    def __str__(self) -> str:
+        parts = [self.path]
+        if self.layer is not None:
+            parts.append(f"layer={self.layer}")
+        if self.page is not None:
+            parts.append(f"page={self.page}")
+        if self.channel is not None:
+            parts.append(f"channel={self.channel}")
+        return DESCRIPTOR_SEP.join(parts)
+
+    @staticmethod
+    def parse(spec: str) -> "SourceRef":
+        """Parse 'path|key=value|...'; a plain path gives a ref with no selector."""
+        path, *selectors = spec.split(DESCRIPTOR_SEP)
+        fields: dict = {}
+        for sel in selectors:
+            key, sep, value = sel.partition("=")
+            key = key.strip().lower()
+            value = value.strip()
+            if not sep or not value:
+                raise ValueError(f"Malformed source selector '{sel}' in '{spec}'")
+            if key == "layer":
+                fields["layer"] = value
+            elif key == "page":
+                fields["page"] = int(value)
+            elif key == "channel":
+                fields["channel"] = value.upper()
+            else:
+                raise ValueError(f"Unknown source selector '{key}' in '{spec}'")
+        return SourceRef(path, **fields)
+
+
+def find_layered_sources(
+    folder: str,
+    suffixes: dict[str, str],
+    layout: dict[str, str],
+    extensions: tuple[str, ...] = (".psd", ".tif", ".tiff", ".png", ".tga"),
+) -> dict[str, dict[str, str]]:
+    """
+    Build find_textures-style groups from single multi-layer files.
+
+    *layout* maps each texture type to the selector part of a descriptor,
+    applied to every file in *folder* with one of *extensions*:
+
+        {'ao': 'layer=AO', 'roughness': 'layer=Rough', 'metallic': 'layer=Metal'}
+        {'ao': 'channel=G', 'roughness': 'channel=A', 'metallic': 'channel=R'}
+
+    The file stem becomes the group base, so 'hero.psd' packs to
+    'hero_ORM.png'. Map keys are the lowercased suffixes, as process_texture
+    expects.
+    """
+    textures: dict[str, dict[str, str]] = {}
+    for entry in sorted(os.scandir(folder), key=lambda e: e.name):
+        if not entry.is_file():
+            continue
+        stem, ext = os.path.splitext(entry.name)
+        if ext.lower() not in extensions or stem.lower().endswith("_orm"):
+            continue
+        textures[stem] = {
+            suffixes[tex_type].lower(): f"{entry.path}{DESCRIPTOR_SEP}{selector}"
+            for tex_type, selector in layout.items()
+        }
+    return textures
+
+
+def load_sources(sources: list) -> list:
+    """
+    Resolve a list of texture sources, decoding each underlying file once.
+
+    Strings are parsed as descriptors. Plain paths (and archive member
+    references) are returned as something Image.open accepts; descriptors are
+    returned as decoded images, with every ref into the same file/frame
+    sharing one decode — three channels of one mask map cost one decode, and
+    three layers of one PSD one open. Non-string sources (bytes, images,
+    arrays, file objects) are passed through untouched.
+    """
+    handles: dict[str, tuple[Image.Image, tuple[int, int]]] = {}
+    frames: dict[tuple, Image.Image] = {}
+    resolved = []
+
+    try:
+        for source in sources:
+            if not isinstance(source, str):
+                resolved.append(source)
+                continue
+
+            ref = SourceRef.parse(source)
+            if not ref.has_selector:
+                resolved.append(open_source(ref.path))
+                continue
+
+            key = (ref.path, ref.layer, ref.page)
+            frame = frames.get(key)
+            if frame is None:
+                frame = _decode_frame(ref, handles)
+                frames[key] = frame
+
+            if ref.channel is not None:
+                if ref.channel not in frame.getbands():
+                    raise ValueError(
+                        f"{ref.path} has no channel '{ref.channel}' (bands: {''.join(frame.getbands())})"
+                    )
+                resolved.append(frame.getchannel(ref.channel))
+            else:
+                resolved.append(frame)
+    finally:
+        for img, _canvas_size in handles.values():
+            img.close()
+
+    return resolved
+
+
+def _decode_frame(ref: SourceRef, handles: dict) -> Image.Image:
+    """Decode the frame a ref points at, reusing one open handle per file."""
+    if ref.layer is None and ref.page is None:
+        # Channel-only ref: the file's main (composite) image. It gets its own
+        # handle, since a layer seek on the shared one cannot be undone.
+        with Image.open(open_source(ref.path)) as main:
+            main.load()
+            return main.copy()
+
+    if ref.path not in handles:
+        img = Image.open(open_source(ref.path))
+        handles[ref.path] = (img, img.size)
+    img, canvas_size = handles[ref.path]
+
+    if ref.layer is not None:
+        layers = getattr(img, "layers", None)
+        if not layers:
+            raise ValueError(f"{ref.path} has no layers")
+        if ref.layer.isdigit():
+            index = int(ref.layer)
+        else:
+            names = [layer[0] for layer in layers]
+            matches = [i for i, name in enumerate(names, 1) if name.lower() == ref.layer.lower()]
+            if not matches:
+                raise ValueError(f"{ref.path} has no layer '{ref.layer}' (layers: {', '.join(names)})")
+            index = matches[0]
+        img.seek(index)
+        frame = img.copy()
+
+        # Layers only cover their bounding box; place them on the full canvas
+        if frame.size != canvas_size:
+            bbox = layers[index - 1][2]
+            canvas = Image.new(frame.mode, canvas_size)
+            canvas.paste(frame, bbox[:2])
+            frame = canvas
+        return frame
+
+    n_frames = getattr(img, "n_frames", 1)
+    if ref.page >= n_frames:
+        raise ValueError(f"{ref.path} has {n_frames} page(s); page {ref.page} requested")
+    img.seek(ref.page)
+    return img.copy()
@@ -0,0 +1,210 @@
+"""
+Two-stage pack engine: decode processes and encode processes that hand
+planes over through shared memory instead of pickling them.
+
+    tasks ──▶ decode workers ──(slot id)──▶ encode workers ──▶ results
+                   │  write 3 L planes           ▲ Image.frombuffer
+                   ▼                             │ (zero-copy view)
+              [ recycled pool of SharedMemory slots ]
+
+A slot holds the three planes of one group back to back. Decode workers
+take a free slot (which also throttles them when encoding falls behind),
+fill it and pass only its index along; encode workers view the planes in
+place, merge them and give the slot back before the PNG encode starts.
+Decode-heavy sets (JPEG sources) want more decode workers, encode-heavy
+sets (large PNG outputs) more encode workers, so both counts are separate.
+
+run() has the same shape as PackScheduler.run, so the two are
+interchangeable; jobs come from PackScheduler.plan / jobs_from_plan.
+"""
+import multiprocessing as mp
+import os
+import queue
+import time
+from collections.abc import Callable
+from multiprocessing import shared_memory
+
+from PIL import Image
+
+from core.library import load_channel
+from core.png_writer import save_png
+from core.scheduler import PackJob, PackScheduler
+from core.source_descriptor import load_sources
+from core.verify import output_record
+
+_TEX_TYPES = ('ao', 'roughness', 'metallic')
+
+
+class StagedEngine:
+    def __init__(
+        self,
+        decode_workers: int = 2,
+        encode_workers: int = 2,
+        memory_budget_mb: int = 2048,
+        slots: int | None = None,
+    ):
+        self.decode_workers = max(1, decode_workers)
+        self.encode_workers = max(1, encode_workers)
+        # Enough slots that every worker of both stages can hold one
+        self.slots = slots or self.decode_workers + self.encode_workers
+        self.memory_budget = memory_budget_mb * 1024 * 1024
+
+    def run(
+        self,
+        jobs: list[PackJob],
+        output_folder: str,
+        suffixes: dict[str, str],
+        on_result: Callable[[PackJob, bool, str], None],
+        should_stop: Callable[[], bool] = lambda: False,
+    ):
+        """
+        Pack *jobs*, calling on_result in this process as each one finishes.
+
+        Jobs whose planes do not fit a slot (the budget split over all
+        slots), or whose size is unknown, run one at a time in this process
+        afterwards, through PackScheduler.pack_low_memory.
+        """
+        slot_limit = self.memory_budget // self.slots
+        staged = [j for j in jobs if 0 < 3 * j.pixels <= slot_limit]
+        spilled = [j for j in jobs if not 0 < 3 * j.pixels <= slot_limit]
+
+        if staged:
+            self._run_stages(staged, output_folder, suffixes, on_result, should_stop)
+
+        for job in spilled:
+            if should_stop():
+                return
+            on_result(job, *PackScheduler.pack_low_memory(job.base, job.maps, output_folder, suffixes))
+
+    def _run_stages(self, jobs, output_folder, suffixes, on_result, should_stop):
+        slot_bytes = 3 * max(j.pixels for j in jobs)
+        blocks = [
+            shared_memory.SharedMemory(create=True, size=slot_bytes)
+            for _ in range(min(self.slots, len(jobs)))
+        ]
+        slot_names = [b.name for b in blocks]
+
+        ctx = mp.get_context()
+        tasks, ready, results, free_slots = ctx.Queue(), ctx.Queue(), ctx.Queue(), ctx.Queue()
+        for index in range(len(blocks)):
+            free_slots.put(index)
+
+        workers = [
+            ctx.Process(target=_decode_worker, args=(tasks, free_slots, ready, results, slot_names, suffixes),
+                        daemon=True)
+            for _ in range(self.decode_workers)
+        ] + [
+            ctx.Process(target=_encode_worker, args=(ready, free_slots, results, slot_names, output_folder),
+                        daemon=True)
+            for _ in range(self.encode_workers)
+        ]
+
+        try:
+            for w in workers:
+                w.start()
+
+            # Keep a short task backlog so a cancel takes effect quickly
+            fed = outstanding = 0
+            while fed < len(jobs) or outstanding:
+                while fed < len(jobs) and outstanding < 2 * self.decode_workers and not should_stop():
+                    job = jobs[fed]
+                    tasks.put((fed, job.base, job.maps, job.width, job.height))
+                    fed += 1
+                    outstanding += 1
+                if should_stop() and not outstanding:
+                    break
+
+                try:
+                    index, success, message = results.get(timeout=1.0)
+                except queue.Empty:
+                    if any(w.exitcode not in (None, 0) for w in workers):
+                        raise RuntimeError("A staged pack worker exited unexpectedly")
+                    continue
+                outstanding -= 1
+                on_result(jobs[index], success, message)
+        finally:
+            for _ in range(self.decode_workers):
+                tasks.put(None)
+            for _ in range(self.encode_workers):
+                ready.put(None)
+            for w in workers:
+                w.join(timeout=10)
+                if w.is_alive():
+                    w.terminate()
+            for block in blocks:
+                block.close()
+                block.unlink()
+
+
+# ---------------------------------------------------------------------- #
+#  Stage processes (module level so they can be spawned on Windows)        #
+# ---------------------------------------------------------------------- #
+
+def _attach(names: list[str]) -> list[shared_memory.SharedMemory]:
+    return [shared_memory.SharedMemory(name=name) for name in names]
+
+
+def _decode_worker(tasks, free_slots, ready, results, slot_names, suffixes):
+    blocks = _attach(slot_names)
+    try:
+        while (task := tasks.get()) is not None:
+            index, base, maps, width, height = task
+            start_time = time.time()
+            slot = free_slots.get()
+            try:
+                keys = [suffixes[t].lower() for t in _TEX_TYPES]
+                missing = [k for k in keys if not maps.get(k)]
+                if missing:
+                    raise ValueError(f"Missing texture map(s): {', '.join(missing)}")
+
+                plane_bytes = width * height
+                buf = blocks[slot].buf
+                for i, source in enumerate(load_sources([maps[k] for k in keys])):
+                    plane = load_channel(source)
+                    if plane.size != (width, height):
+                        raise ValueError(
+                            f"Image sizes do not match: expected {(width, height)}, "
+                            f"{keys[i]} is {plane.size}"
+                        )
+                    buf[i * plane_bytes:(i + 1) * plane_bytes] = plane.tobytes()
+                    del plane
+            except Exception as e:
+                free_slots.put(slot)
+                results.put((index, False, str(e)))
+                continue
+            ready.put((index, base, [maps[k] for k in keys], slot, width, height, start_time))
+    finally:
+        for block in blocks:
+            block.close()
+
+
+def _encode_worker(ready, free_slots, results, slot_names, output_folder):
+    blocks = _attach(slot_names)
+    try:
+        while (item := ready.get()) is not None:
+            index, base, sources, slot, width, height, start_time = item
+            try:
+                plane_bytes = width * height
+                view = blocks[slot].buf
+                planes = [
+                    Image.frombuffer("L", (width, height), view[i * plane_bytes:(i + 1) * plane_bytes],
+                                     "raw", "L", 0, 1)
+                    for i in range(3)
+                ]
+                orm_img = Image.merge("RGB", planes)
+                # merge() copied the pixels; the slot can go back right away
+                del planes
+                free_slots.put(slot)
+                slot = None
+
+                save_png(orm_img, os.path.join(output_folder, f"{base}_ORM.png"),
+                         text=output_record(orm_img, sources))
+                elapsed = time.time() - start_time
+                results.put((index, True, f"Packed <b>{base}_ORM</b> in <b>{elapsed:.1f}s</b>"))
+            except Exception as e:
+                if slot is not None:
+                    free_slots.put(slot)
+                results.put((index, False, str(e)))
+    finally:
+        for block in blocks:
+            block.close()
@@ -1,7 +1,16 @@
+import io
 import os
+import posixpath
 import re
 import time
-from PIL import Image
+from collections.abc import Iterator
+from core.archive_io import ArchiveReader, ArchiveWriter, is_archive, member_ref, open_source
+from core.library import load_rgb, pack_images
+from core.png_writer import save_png
+from core.verify import output_record
+
+# Message prefix of an unpack that wrote nothing because every map existed
+UNPACK_SKIPPED = "Skipped"
 
 
 class TexturePackerCore:
@@ -26,7 +35,27 @@ class TexturePackerCore:
         maps: dict[str, str],
         output_folder: str,
         suffixes: dict[str, str],
+        writer: ArchiveWriter | None = None,
+        concurrent_decode: bool = False,
+        parallel_encode: bool = False,
+        record_sources: list | None = None,
     ) -> tuple[bool, str]:
+        """
+        Merge the AO / roughness / metallic maps of one group into *_ORM.png.
+
+        Map values may be file paths, archive member references, source
+        descriptors (a layer / page / channel of one file) or the raw bytes
+        of an archive member. When *writer* is given the result is
+        added to that archive instead of being saved into output_folder.
+
+        *concurrent_decode* decodes the three maps on parallel threads and
+        *parallel_encode* compresses large outputs on all cores (see
+        core.png_writer) — latency modes for packing one group at a time;
+        leave them off when groups already run in parallel processes.
+
+        *record_sources* (AO, roughness, metallic) replaces the maps in the
+        output's verify record, for callers that pass pre-decoded images.
+        """
         try:
             start_time = time.time()
 
@@ -50,17 +79,19 @@ class TexturePackerCore:
                 ]
                 return False, f"Missing texture map(s): {', '.join(missing)}"
 
-            ao_img    = Image.open(ao_path).convert("L")
-            rough_img = Image.open(rough_path).convert("L")
-            metal_img = Image.open(metal_path).convert("L")
-
-            if ao_img.size != rough_img.size or ao_img.size != metal_img.size:
-                sizes = f"AO={ao_img.size} R={rough_img.size} M={metal_img.size}"
-                return False, f"Image sizes do not match: {sizes}"
-
-            orm_img  = Image.merge("RGB", (ao_img, rough_img, metal_img))
-            out_path = os.path.join(output_folder, f"{base}_ORM.png")
-            orm_img.save(out_path, optimize=True)
+            # Sources are resolved (archive members, descriptors) inside
+            # pack_images; it raises ValueError on mismatched sizes, which is
+            # reported below like any error
+            orm_img = pack_images(ao_path, rough_path, metal_path, concurrent_decode)
+            # Checksum + source stamps for a later `verify` (core.verify)
+            record = output_record(orm_img, record_sources or [ao_path, rough_path, metal_path])
+            if writer is not None:
+                buffer = io.BytesIO()
+                save_png(orm_img, buffer, parallel_encode, text=record)
+                writer.write(f"{base}_ORM.png", buffer.getvalue())
+            else:
+                out_path = os.path.join(output_folder, f"{base}_ORM.png")
+                save_png(orm_img, out_path, parallel_encode, text=record)
 
             elapsed = time.time() - start_time
             return True, f"Packed <b>{base}_ORM</b> in <b>{elapsed:.1f}s</b>"
@@ -97,6 +128,38 @@ class TexturePackerCore:
             Pattern shape:  ^(.+?)(_ao|_r|_m)\.(png|jpg)$   (re.IGNORECASE)
             Correct match:  rock_wall_AO.png  →  base='rock_wall', sfx='_AO'
             Was matching:   rock_wall__ao.png (never found → 0 groups)
+
+        If *folder* is a zip/tar archive its members are listed instead and the
+        returned paths are archive member references (see core.archive_io).
+        """
+        match = TexturePackerCore._build_matcher(suffixes)
+        if match is None:
+            return {}
+
+        textures: dict[str, dict[str, str]] = {}
+
+        for filename, full_path in TexturePackerCore._list_entries(folder):
+            hit = match(filename)
+            if hit:
+                base, user_key = hit
+                textures.setdefault(base, {})[user_key] = full_path
+
+        return textures
+
+    @staticmethod
+    def _list_entries(folder: str) -> list[tuple[str, str]]:
+        """(file name, full path or member reference) for a folder or archive."""
+        if is_archive(folder):
+            with ArchiveReader(folder) as reader:
+                return [(posixpath.basename(n), member_ref(folder, n)) for n in reader.names()]
+        return [(f, os.path.join(folder, f)) for f in os.listdir(folder)]
+
+    @staticmethod
+    def _build_matcher(suffixes: dict[str, str]):
+        """
+        Compile the suffix regex once and return a function that maps a file
+        name to (base, user_key), or None when it is not a texture we want.
+        Returns None instead of a function when no suffixes are configured.
         """
         # Build suffix → tex_type lookup; normalise to lowercase for matching
         suffix_to_type: dict[str, str] = {}
@@ -105,19 +168,17 @@ class TexturePackerCore:
                 suffix_to_type[sfx.lower()] = tex_type
 
         if not suffix_to_type:
-            return {}
+            return None
 
         # Each suffix already contains its own leading '_', e.g. '_ao'
         # so the pattern is:  ^(base)(_ao|_r|_m)\.(png|jpg)$
         alt = '|'.join(re.escape(s) for s in suffix_to_type)
         pattern = re.compile(rf"^(.+?)({alt})\.(png|jpg)$", re.IGNORECASE)
 
-        textures: dict[str, dict[str, str]] = {}
-
-        for filename in os.listdir(folder):
+        def match(filename: str) -> tuple[str, str] | None:
             m = pattern.match(filename)
             if not m:
-                continue
+                return None
 
             base       = m.group(1)                    # e.g. 'rock_wall'
             sfx_raw    = m.group(2)                    # e.g. '_AO'  (original case)
@@ -127,8 +188,137 @@ class TexturePackerCore:
             # Store under the *lowercased* user suffix so process_texture
             # can retrieve it with a simple .lower() call
             user_key   = suffixes[tex_type].lower()    # e.g. '_ao'
-            full_path  = os.path.join(folder, filename)
+            return base, user_key
 
-            textures.setdefault(base, {})[user_key] = full_path
+        return match
 
-        return textures
+    @staticmethod
+    def iter_archive_groups(
+        archive_path: str,
+        suffixes: dict[str, str],
+    ) -> Iterator[tuple[str, dict[str, bytes]]]:
+        """
+        Stream texture groups out of a zip/tar bundle in a single pass.
+
+        Members are read in archive order; as soon as a group has all three
+        maps it is yielded with the member *bytes* as map values, so it can go
+        straight to process_texture and be dropped from memory. Groups still
+        incomplete when the archive ends are yielded last, with whatever maps
+        were found, so the caller can report them as skipped.
+        """
+        match = TexturePackerCore._build_matcher(suffixes)
+        if match is None:
+            return
+
+        required = {s.lower() for s in suffixes.values()}
+        pending: dict[str, dict[str, bytes]] = {}
+
+        with ArchiveReader(archive_path) as reader:
+            for name, data in reader.iter_members(wanted=lambda n: match(n) is not None):
+                base, user_key = match(posixpath.basename(name))
+                maps = pending.setdefault(base, {})
+                maps[user_key] = data
+                if required <= maps.keys():
+                    yield base, pending.pop(base)
+
+        yield from pending.items()
+
+    # ------------------------------------------------------------------ #
+    #  Unpack (ORM → separate channel maps)                                #
+    # ------------------------------------------------------------------ #
+
+    _PACKED_RE = re.compile(r"^(.+?)_orm\.(png|jpg)$", re.IGNORECASE)
+
+    @staticmethod
+    def find_packed_textures(folder: str) -> dict[str, str]:
+        """
+        Find packed *_ORM.png / *_ORM.jpg files (case-insensitive).
+
+        Returned dict example:
+            {'rock_wall': '/path/rock_wall_ORM.png'}
+
+        For a zip/tar bundle the values are member references; unpack the
+        bundle with iter_archive_packed instead of opening them one by one.
+        """
+        packed: dict[str, str] = {}
+        for filename, full_path in TexturePackerCore._list_entries(folder):
+            m = TexturePackerCore._PACKED_RE.match(filename)
+            if m:
+                packed[m.group(1)] = full_path
+        return packed
+
+    @staticmethod
+    def iter_archive_packed(archive_path: str) -> Iterator[tuple[str, bytes]]:
+        """
+        Stream (base, ORM bytes) out of a zip/tar bundle in a single pass,
+        so a compressed tarball is decompressed once rather than per member.
+        """
+        pattern = TexturePackerCore._PACKED_RE
+        with ArchiveReader(archive_path) as reader:
+            for name, data in reader.iter_members(wanted=lambda n: pattern.match(n) is not None):
+                yield pattern.match(posixpath.basename(name)).group(1), data
+
+    @staticmethod
+    def unpack_texture(
+        base: str,
+        orm_path: str | bytes,
+        output_folder: str,
+        suffixes: dict[str, str],
+        channels: tuple[str, ...] = ('ao', 'roughness', 'metallic'),
+        overwrite: bool = False,
+    ) -> tuple[bool, str]:
+        """
+        Split one packed ORM texture back into single-channel maps.
+
+        The ORM file is decoded once and every requested channel is written
+        from that one decode as '{base}{suffix}.png', using the first suffix
+        configured for the channel (e.g. 'rock_wall_AO.png'). Existing files
+        are kept unless *overwrite* is set; when that leaves nothing to
+        write, the message starts with UNPACK_SKIPPED.
+        """
+        try:
+            start_time = time.time()
+
+            bands = dict(zip(
+                ('ao', 'roughness', 'metallic'),
+                load_rgb(open_source(orm_path)).split(),
+            ))
+
+            written, kept = [], []
+            for tex_type in channels:
+                names = TexturePackerCore.get_suffixes(suffixes[tex_type])
+                if not names:
+                    return False, f"No suffix configured for '{tex_type}'"
+                out_name = f"{base}{names[0]}.png"
+                out_path = os.path.join(output_folder, out_name)
+                if os.path.exists(out_path) and not overwrite:
+                    kept.append(out_name)
+                    continue
+                bands[tex_type].save(out_path, optimize=True)
+                written.append(out_name)
+
+            if not written:
+                return True, f"{UNPACK_SKIPPED} <b>{base}_ORM</b>: all maps already exist ({', '.join(kept)})"
+
+            elapsed = time.time() - start_time
+            message = f"Unpacked <b>{base}_ORM</b> → {len(written)} map(s) in <b>{elapsed:.1f}s</b>"
+            if kept:
+                message += f" (kept existing: {', '.join(kept)})"
+            return True, message
+
+        except Exception as e:
+            return False, str(e)
+
+    @staticmethod
+    def unpack_group(
+        base: str,
+        maps: dict[str, str],
+        output_folder: str,
+        suffixes: dict[str, str],
+        channels: tuple[str, ...] = ('ao', 'roughness', 'metallic'),
+        overwrite: bool = False,
+    ) -> tuple[bool, str]:
+        """process_texture-shaped adapter so unpack jobs can share the scheduler."""
+        return TexturePackerCore.unpack_texture(
+            base, maps['orm'], output_folder, suffixes, channels, overwrite
+        )
@@ -0,0 +1,148 @@
+import re
+import time
+from dataclasses import dataclass, field
+
+# Tile sets are named Mari-style (hero_$UDIM); angle-bracket forms such as
+# hero_<UDIM> would be swallowed by the HTML log.
+#
+# Tile tokens at the end of a group base, e.g. for 'hero_1001_ao.png' the
+# base find_textures reports is 'hero_1001':
+#   hero_1001 / hero.1001   → UDIM 1001–1999
+#   hero_u1_v1 / hero.u1_v1 → Mudbox/ZBrush style UV tile (1-based)
+_UDIM_RE   = re.compile(r"^(?P<asset>.+?)(?P<sep>[._])(?P<tile>1\d{3})$")
+_UVTILE_RE = re.compile(r"^(?P<asset>.+?)(?P<sep>[._])(?P<tile>u\d+_v\d+)$", re.IGNORECASE)
+
+
+def split_tile(base: str) -> tuple[str, str] | None:
+    """
+    'hero_1001'  → ('hero_$UDIM', '1001')
+    'hero_u2_v1' → ('hero_$UVTILE', 'u2_v1')
+    Returns None for bases without a tile token.
+    """
+    m = _UDIM_RE.match(base)
+    if m:
+        return f"{m.group('asset')}{m.group('sep')}$UDIM", m.group("tile")
+    m = _UVTILE_RE.match(base)
+    if m:
+        return f"{m.group('asset')}{m.group('sep')}$UVTILE", m.group("tile").lower()
+    return None
+
+
+@dataclass(frozen=True)
+class TileSet:
+    """All tiles of one UDIM / UV-tile asset."""
+    name: str                       # e.g. 'hero_$UDIM'
+    tiles: tuple[tuple[str, str], ...]  # (tile, group base), sorted by tile
+
+    @property
+    def bases(self) -> list[str]:
+        return [base for _tile, base in self.tiles]
+
+    @property
+    def tile_range(self) -> str:
+        first, last = self.tiles[0][0], self.tiles[-1][0]
+        return first if first == last else f"{first}–{last}"
+
+
+def _tile_sort_key(tile: str):
+    if tile.isdigit():
+        return 0, int(tile), 0
+    u, v = re.findall(r"\d+", tile)
+    return 1, int(v), int(u)
+
+
+def group_tiles(textures: dict[str, dict[str, str]]) -> dict[str, TileSet]:
+    """
+    Collect the groups of *textures* (find_textures output) that carry a
+    tile token into one TileSet per asset. Groups without a token are not
+    included — they stay ordinary single-texture groups — and neither is a
+    lone token: 'crate_1024' is far more likely a resolution than a
+    one-tile UDIM set.
+    """
+    found: dict[str, list[tuple[str, str]]] = {}
+    for base in textures:
+        hit = split_tile(base)
+        if hit:
+            name, tile = hit
+            found.setdefault(name, []).append((tile, base))
+
+    return {
+        name: TileSet(name, tuple(sorted(tiles, key=lambda t: _tile_sort_key(t[0]))))
+        for name, tiles in found.items()
+        if len(tiles) > 1
+    }
+
+
+def validate_tile_set(
+    tile_set: TileSet,
+    textures: dict[str, dict[str, str]],
+    suffixes: dict[str, str],
+    sizes: dict[str, tuple[int, int]] | None = None,
+) -> tuple[list[str], list[str]]:
+    """
+    Check a tile set as a whole before any tile is packed.
+
+    Returns (errors, warnings). Any tile missing a map is an error for the
+    whole asset, since a half-packed UDIM set is worse than none. Tiles with
+    differing resolutions (from *sizes*, base → (w, h), if known) only warn:
+    mixed texel density across tiles is legitimate.
+    """
+    required = [s.lower() for s in suffixes.values()]
+    errors, warnings = [], []
+
+    for tile, base in tile_set.tiles:
+        missing = [key for key in required if key not in textures[base]]
+        if missing:
+            errors.append(f"tile {tile} missing {', '.join(sorted(missing))}")
+
+    if sizes:
+        distinct = {sizes[b] for b in tile_set.bases if sizes.get(b)}
+        if len(distinct) > 1:
+            listed = ", ".join(f"{w}x{h}" for w, h in sorted(distinct))
+            warnings.append(f"tiles use different resolutions ({listed})")
+
+    return errors, warnings
+
+
+@dataclass
+class TileSetTracker:
+    """
+    Aggregate per-tile results so each tile set is reported as one asset.
+
+    record() returns the summary line once the last tile of a set has come
+    back, and None before that (or for bases that are not tiles).
+    """
+    tile_sets: dict[str, TileSet]
+    _owner: dict[str, str] = field(default_factory=dict)
+    _done: dict[str, list[tuple[str, bool, str]]] = field(default_factory=dict)
+    started: float = field(default_factory=time.time)
+
+    def __post_init__(self):
+        for name, tile_set in self.tile_sets.items():
+            for base in tile_set.bases:
+                self._owner[base] = name
+
+    def owns(self, base: str) -> bool:
+        return base in self._owner
+
+    def record(self, base: str, success: bool, message: str) -> tuple[bool, str] | None:
+        name = self._owner.get(base)
+        if name is None:
+            return None
+        results = self._done.setdefault(name, [])
+        results.append((base, success, message))
+
+        tile_set = self.tile_sets[name]
+        if len(results) < len(tile_set.tiles):
+            return None
+
+        failed = [(b, m) for b, ok, m in results if not ok]
+        elapsed = time.time() - self.started
+        packed = len(results) - len(failed)
+        summary = (
+            f"Packed <b>{name}</b>: {packed}/{len(results)} tile(s) "
+            f"({tile_set.tile_range}) in <b>{elapsed:.1f}s</b>"
+        )
+        if failed:
+            summary += " — failed: " + "; ".join(f"{b}: {m}" for b, m in failed)
+        return not failed, summary
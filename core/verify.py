@@ -0,0 +1,187 @@
+"""
+Post-pack verification of *_ORM.png outputs.
+
+At pack time every output gets a small JSON record in a PNG tEXt chunk
+(see output_record): a digest of its decoded pixels plus the mtime / size
+of each source. Keeping it inside the file means parallel processes and
+queue nodes never have to share a manifest, and the record travels with
+the texture.
+
+verify_outputs later checks each output on a thread pool:
+
+    corrupt     chunk CRC error, undecodable data or pixel digest mismatch
+    truncated   the file ends before its image data does
+    stale       a source changed since packing, or sampled source pixels
+                no longer match the output's channels
+    unrecorded  decodes fine but was packed without a record
+    ok          everything matches
+"""
+import hashlib
+import json
+import os
+import random
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from PIL import Image
+
+from core.archive_io import split_member_ref
+from core.library import load_channel
+from core.source_descriptor import SourceRef, load_sources
+
+RECORD_KEY = "ORMPacker"
+
+OK = "ok"
+CORRUPT = "corrupt"
+TRUNCATED = "truncated"
+STALE = "stale"
+UNRECORDED = "unrecorded"
+
+_BAND_ROWS = 256
+_CHANNELS = ("R", "G", "B")
+
+
+@dataclass(frozen=True)
+class VerifyResult:
+    path: str
+    status: str
+    message: str = ""
+
+    @property
+    def ok(self) -> bool:
+        return self.status in (OK, UNRECORDED)
+
+
+# ---------------------------------------------------------------------- #
+#  Pack side                                                               #
+# ---------------------------------------------------------------------- #
+
+def pixel_digest(img: Image.Image) -> str:
+    """Digest of mode, size and pixel data, hashed band by band."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{img.mode}:{img.width}x{img.height}".encode())
+    for y in range(0, img.height, _BAND_ROWS):
+        digest.update(img.crop((0, y, img.width, min(y + _BAND_ROWS, img.height))).tobytes())
+    return digest.hexdigest()
+
+
+def _stamp(source) -> dict | None:
+    """mtime / size of the file behind a source string; None if not a file."""
+    if not isinstance(source, str):
+        return None
+    path = SourceRef.parse(source).path
+    member = split_member_ref(path)
+    file_path = member[0] if member else path
+    try:
+        st = os.stat(file_path)
+    except OSError:
+        return None
+    # Absolute, so verify works from any working directory
+    if not os.path.isabs(file_path):
+        source = os.path.abspath(file_path) + source[len(file_path):]
+    return {"source": source, "mtime_ns": st.st_mtime_ns, "bytes": st.st_size}
+
+
+def output_record(orm_img: Image.Image, sources: list) -> dict[str, str]:
+    """
+    tEXt chunk contents for an output packed from *sources* (AO, roughness,
+    metallic — the R, G, B order). Non-file sources (bytes, images) are
+    recorded as null and skipped by the staleness checks.
+    """
+    record = {
+        "v": 1,
+        "pixels": pixel_digest(orm_img),
+        "sources": [_stamp(source) for source in sources],
+    }
+    return {RECORD_KEY: json.dumps(record, separators=(",", ":"))}
+
+
+# ---------------------------------------------------------------------- #
+#  Verify side                                                             #
+# ---------------------------------------------------------------------- #
+
+def find_outputs(folder: str) -> list[str]:
+    with os.scandir(folder) as it:
+        return sorted(
+            entry.path for entry in it
+            if entry.is_file() and entry.name.lower().endswith("_orm.png")
+        )
+
+
+def verify_output(path: str, samples: int = 32) -> VerifyResult:
+    """Check one output; see the module docstring for the statuses."""
+    # --- 1. Structure: chunk CRCs and chunk lengths, no pixel decoding ---
+    try:
+        with Image.open(path) as img:
+            img.verify()
+    except Exception as e:
+        return _failure(path, e)
+
+    # --- 2. Decode and compare against the recorded digest ---
+    try:
+        with Image.open(path) as img:
+            img.load()
+            text = dict(getattr(img, "text", {}))
+            record = json.loads(text[RECORD_KEY]) if RECORD_KEY in text else None
+            if record is None:
+                return VerifyResult(path, UNRECORDED, "no pack record; decodes cleanly")
+            if pixel_digest(img) != record.get("pixels"):
+                return VerifyResult(path, CORRUPT, "pixel data does not match the checksum recorded at pack time")
+
+            # --- 3. Sources: stamps first, then sampled pixels ---
+            return _check_sources(path, img, record.get("sources") or [], samples)
+    except Exception as e:
+        return _failure(path, e)
+
+
+def _check_sources(path: str, img: Image.Image, stamps: list, samples: int) -> VerifyResult:
+    for stamp in stamps:
+        if stamp is None:
+            continue
+        now = _stamp(stamp["source"])
+        if now is None:
+            return VerifyResult(path, STALE, f"source {stamp['source']} no longer exists")
+        if (now["mtime_ns"], now["bytes"]) != (stamp["mtime_ns"], stamp["bytes"]):
+            return VerifyResult(path, STALE, f"source {stamp['source']} changed after packing")
+
+    if samples <= 0:
+        return VerifyResult(path, OK)
+
+    # Same points every run for a given file, spread over the whole image
+    rng = random.Random(os.path.basename(path))
+    points = [(rng.randrange(img.width), rng.randrange(img.height)) for _ in range(samples)]
+    for channel, stamp in zip(_CHANNELS, stamps):
+        if stamp is None:
+            continue
+        source = load_channel(load_sources([stamp["source"]])[0])
+        band = img.getchannel(channel)
+        if source.size != img.size:
+            return VerifyResult(path, STALE, f"{stamp['source']} is now {source.size}, output is {img.size}")
+        bad = sum(1 for p in points if source.getpixel(p) != band.getpixel(p))
+        if bad:
+            return VerifyResult(
+                path, STALE, f"{bad}/{samples} sampled {channel} pixels differ from {stamp['source']}"
+            )
+    return VerifyResult(path, OK)
+
+
+def _failure(path: str, error: Exception) -> VerifyResult:
+    text = str(error)
+    if "truncated" in text.lower() or isinstance(error, EOFError) or "EOF" in text:
+        return VerifyResult(path, TRUNCATED, text)
+    return VerifyResult(path, CORRUPT, text)
+
+
+def verify_outputs(
+    paths: list[str],
+    max_workers: int | None = None,
+    samples: int = 32,
+) -> Iterator[VerifyResult]:
+    """
+    Verify *paths* in parallel and yield their results in the same order.
+    Threads suffice: decoding, hashing and zlib all release the GIL.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        yield from pool.map(lambda p: verify_output(p, samples), paths)
@@ -0,0 +1,270 @@
+import json
+import os
+import sqlite3
+import time
+import uuid
+from dataclasses import dataclass
+
+from core.archive_io import require_random_access
+from core.pack_plan import PackPlan
+
+
+@dataclass(frozen=True)
+class QueueJob:
+    """One group-level work item as handed to a packer node."""
+    job_id: int
+    run_id: str
+    base: str
+    maps: dict[str, str]
+    output_folder: str
+    suffixes: dict[str, str]
+    attempts: int
+
+
+class WorkQueue:
+    """
+    Group-level work queue stored in a SQLite file inside a shared folder.
+
+    A coordinator splits a run into one row per texture group; any number of
+    packer nodes (processes on this or other machines) then claim rows with a
+    time-limited lease, renew it with heartbeats while packing and finally
+    report the result back into the same row.
+
+    Job states:
+        pending  → waiting to be claimed
+        leased   → claimed by a node; lease_expires must keep moving forward
+        done     → packed successfully
+        failed   → packing reported an error, or the lease expired too often
+
+    A lease that expires (node crashed, machine unplugged, share hiccup) is
+    put back to 'pending' by the next claim() call, until max_attempts is
+    reached — after that the job is marked 'failed' so a poisoned group can
+    not keep the whole run from draining.
+    """
+
+    DB_NAME = "orm_queue.sqlite3"
+
+    def __init__(self, queue_dir: str, lease_seconds: float = 60.0, max_attempts: int = 3):
+        self.queue_dir = queue_dir
+        self.db_path = os.path.join(queue_dir, self.DB_NAME)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+        os.makedirs(queue_dir, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id            INTEGER PRIMARY KEY AUTOINCREMENT,
+                    run_id        TEXT NOT NULL,
+                    base          TEXT NOT NULL,
+                    maps          TEXT NOT NULL,
+                    output_folder TEXT NOT NULL,
+                    suffixes      TEXT NOT NULL,
+                    state         TEXT NOT NULL DEFAULT 'pending',
+                    attempts      INTEGER NOT NULL DEFAULT 0,
+                    lease_owner   TEXT,
+                    lease_expires REAL,
+                    message       TEXT,
+                    finished_at   REAL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, id)")
+
+    # ------------------------------------------------------------------ #
+    #  Connection helper                                                   #
+    # ------------------------------------------------------------------ #
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Open a short-lived connection.
+
+        Every call gets its own connection so the queue can be used from the
+        heartbeat thread and from separate processes without sharing handles.
+        The default rollback journal is kept on purpose: WAL mode relies on
+        shared memory and is not safe on network shares.
+        """
+        conn = sqlite3.connect(self.db_path, timeout=30.0, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    # ------------------------------------------------------------------ #
+    #  Coordinator side                                                    #
+    # ------------------------------------------------------------------ #
+
+    def enqueue_run(
+        self,
+        folder: str,
+        suffixes: dict[str, str],
+        output_folder: str | None = None,
+    ) -> tuple[str, int]:
+        """
+        Scan *folder* once and write one job per complete texture group.
+
+        Groups with missing maps are not queued — they are the same
+        'Skipping ...' case PackerWorker reports locally, and no node could
+        pack them anyway. Returns (run_id, number_of_jobs). Raises ValueError
+        for compressed tarballs, which nodes could only read in quadratic time.
+        """
+        # Nodes open member refs one by one, so a bundle must allow that
+        require_random_access(folder)
+        # Nodes run on other machines with other working directories
+        folder = os.path.abspath(folder)
+        output_folder = os.path.abspath(output_folder or folder)
+        plan = PackPlan.build(folder, suffixes, read_headers=False, output=output_folder)
+
+        run_id = uuid.uuid4().hex[:12]
+        rows = [
+            (run_id, g.base, json.dumps(g.maps), output_folder, json.dumps(suffixes))
+            for g in plan.groups
+            if g.complete
+        ]
+
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                "INSERT INTO jobs (run_id, base, maps, output_folder, suffixes) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+        return run_id, len(rows)
+
+    def summary(self, run_id: str | None = None) -> dict[str, int]:
+        """Return job counts per state, e.g. {'pending': 3, 'done': 10}."""
+        query = "SELECT state, COUNT(*) AS n FROM jobs"
+        args: tuple = ()
+        if run_id:
+            query += " WHERE run_id = ?"
+            args = (run_id,)
+        query += " GROUP BY state"
+
+        conn = self._connect()
+        try:
+            counts = {row["state"]: row["n"] for row in conn.execute(query, args)}
+        finally:
+            conn.close()
+
+        for state in ("pending", "leased", "done", "failed"):
+            counts.setdefault(state, 0)
+        return counts
+
+    def is_drained(self, run_id: str | None = None) -> bool:
+        counts = self.summary(run_id)
+        return counts["pending"] == 0 and counts["leased"] == 0
+
+    def results(self, run_id: str) -> list[dict]:
+        """Aggregate finished jobs of a run, in the order they were queued."""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT base, state, attempts, lease_owner, message, finished_at "
+                "FROM jobs WHERE run_id = ? ORDER BY id",
+                (run_id,),
+            ).fetchall()
+        finally:
+            conn.close()
+        return [dict(row) for row in rows]
+
+    # ------------------------------------------------------------------ #
+    #  Node side                                                           #
+    # ------------------------------------------------------------------ #
+
+    def claim(self, node_id: str, run_id: str | None = None) -> QueueJob | None:
+        """
+        Lease the oldest pending job to *node_id*, or return None if there
+        is nothing to do right now.
+
+        Expired leases are recycled inside the same write transaction, so two
+        nodes can never both see the same job as free.
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+
+            # --- 1. Recycle expired leases ---
+            conn.execute(
+                "UPDATE jobs SET state = 'failed', lease_owner = NULL, finished_at = ?, "
+                "message = 'Lease expired ' || attempts || ' time(s); giving up' "
+                "WHERE state = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, now, self.max_attempts),
+            )
+            conn.execute(
+                "UPDATE jobs SET state = 'pending', lease_owner = NULL "
+                "WHERE state = 'leased' AND lease_expires < ?",
+                (now,),
+            )
+
+            # --- 2. Pick the next pending job ---
+            query = "SELECT * FROM jobs WHERE state = 'pending'"
+            args: tuple = ()
+            if run_id:
+                query += " AND run_id = ?"
+                args = (run_id,)
+            row = conn.execute(query + " ORDER BY id LIMIT 1", args).fetchone()
+
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+
+            conn.execute(
+                "UPDATE jobs SET state = 'leased', lease_owner = ?, lease_expires = ?, "
+                "attempts = attempts + 1 WHERE id = ?",
+                (node_id, now + self.lease_seconds, row["id"]),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+        return QueueJob(
+            job_id=row["id"],
+            run_id=row["run_id"],
+            base=row["base"],
+            maps=json.loads(row["maps"]),
+            output_folder=row["output_folder"],
+            suffixes=json.loads(row["suffixes"]),
+            attempts=row["attempts"] + 1,
+        )
+
+    def heartbeat(self, job_id: int, node_id: str) -> bool:
+        """
+        Extend the lease on *job_id*.
+        Returns False if the lease was lost (expired and re-claimed elsewhere).
+        """
+        conn = self._connect()
+        try:
+            cur = conn.execute(
+                "UPDATE jobs SET lease_expires = ? "
+                "WHERE id = ? AND lease_owner = ? AND state = 'leased'",
+                (time.time() + self.lease_seconds, job_id, node_id),
+            )
+            return cur.rowcount == 1
+        finally:
+            conn.close()
+
+    def complete(self, job_id: int, node_id: str, success: bool, message: str) -> bool:
+        """
+        Record the result of a job.
+        Only the current lease holder may do so; a late result from a node
+        whose lease already expired is dropped and False is returned.
+        """
+        conn = self._connect()
+        try:
+            cur = conn.execute(
+                "UPDATE jobs SET state = ?, message = ?, finished_at = ?, lease_expires = NULL "
+                "WHERE id = ? AND lease_owner = ? AND state = 'leased'",
+                ("done" if success else "failed", message, time.time(), job_id, node_id),
+            )
+            return cur.rowcount == 1
+        finally:
+            conn.close()
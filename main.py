@@ -1,3 +1,4 @@
+import multiprocessing
 import sys
 from PySide6.QtWidgets import QApplication
 from PySide6.QtGui import QIcon
@@ -5,7 +6,14 @@ from ui.main_window import TexturePackerWindow
 from utils.path_utils import resource_path
 
 if __name__ == "__main__":
+    # Needed for the packing process pool in the frozen (PyInstaller) build
+    multiprocessing.freeze_support()
+
     app = QApplication(sys.argv)
+    # Same names as the QSettings store; also fixes the per-user cache
+    # folder (thumbnails) instead of deriving it from the executable name
+    app.setOrganizationName("BadGamesOK")
+    app.setApplicationName("TexturePacker")
 
     # Set application-wide icon
     icon_path = resource_path("resources/icon.ico")
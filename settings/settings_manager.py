@@ -18,6 +18,9 @@ class SettingsManager:
             advanced = settings.get('advanced', {})
             for option in ['export_log', 'dark_theme', 'play_sound']:
                 self._settings.setValue(option, advanced.get(option, False))
+            self._settings.setValue("workers", advanced.get('workers', 1))
+            self._settings.setValue("memory_budget_mb", advanced.get('memory_budget_mb', 2048))
+            self._settings.setValue("service_url", advanced.get('service_url', ""))
 
             print("Settings saved successfully")
         except Exception as e:
@@ -34,6 +37,9 @@ class SettingsManager:
             'advanced': {
                 'export_log': self._settings.value("export_log", False, type=bool),
                 'dark_theme': self._settings.value("dark_theme", False, type=bool),
-                'play_sound': self._settings.value("play_sound", False, type=bool)
+                'play_sound': self._settings.value("play_sound", False, type=bool),
+                'workers': self._settings.value("workers", 1, type=int),
+                'memory_budget_mb': self._settings.value("memory_budget_mb", 2048, type=int),
+                'service_url': self._settings.value("service_url", "", type=str)
             }
         }
\ No newline at end of file
@@ -4,9 +4,10 @@ import webbrowser
 from typing import cast
 
 from PySide6.QtCore import QThread
-from PySide6.QtCore import QTimer, QPoint
+from PySide6.QtCore import QTimer, QPoint, QStandardPaths
 
 
+from core.archive_io import is_archive
 from utils.file_cleaner import FileCleaner
 from utils.path_utils import get_base_dir
 from PySide6.QtWidgets import QApplication
@@ -15,10 +16,11 @@ from PySide6.QtWidgets import QPushButton, QToolTip
 from PySide6.QtWidgets import QSizePolicy
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLineEdit,
                                QLabel, QTextEdit, QProgressBar,
-                               QGroupBox, QCheckBox, QFileDialog)
+                               QGroupBox, QCheckBox, QFileDialog, QSpinBox)
 from utils.path_utils import resource_path
 from settings.settings_manager import SettingsManager
 from worker.packer_worker import PackerWorker
+from ui.preview_panel import PreviewPanel
 from utils.sound_player import SoundPlayer
 
 
@@ -49,6 +51,7 @@ class TexturePackerWindow(QWidget):
         self._create_folder_ui()
         self._create_suffix_ui()
         self._create_log_ui()
+        self._create_preview_ui()
         self._create_advanced_ui()
         buttons_container = self._create_buttons()  # Get the container widget
 
@@ -58,6 +61,8 @@ class TexturePackerWindow(QWidget):
         layout.addLayout(self.suffix_layout)
         layout.addWidget(self.log_output)
         layout.addWidget(self.progress_bar)
+        layout.addWidget(self.preview_button)
+        layout.addWidget(self.preview_panel)
         layout.addWidget(self.advanced_button)
         layout.addWidget(self.advanced_options_group)
 
@@ -109,6 +114,16 @@ class TexturePackerWindow(QWidget):
         self.progress_bar = QProgressBar()
         self.progress_bar.setValue(0)
 
+    def _create_preview_ui(self):
+        # Preview toggle button
+        self.preview_button = self.make_button("🖼️ Preview ▼", "preview_button_t")
+        self.preview_button.setCheckable(True)
+
+        # Thumbnail grid; thumbnails persist in the per-user cache folder
+        cache_root = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.CacheLocation)
+        self.preview_panel = PreviewPanel(os.path.join(cache_root, "thumbnails"))
+        self.preview_panel.setVisible(False)
+
     def _create_advanced_ui(self):
         # Advanced options toggle button
         self.advanced_button = self.make_button("Advanced Options ▼", "adv_opt_button_t")
@@ -123,11 +138,39 @@ class TexturePackerWindow(QWidget):
         self.dark_theme_checkbox = QCheckBox("🌙 Dark theme")
         self.sound_checkbox = QCheckBox("🔔 Play sound on finish")
 
+        # Parallel packing: worker count and RAM budget for the scheduler
+        self.workers_spin = QSpinBox()
+        self.workers_spin.setRange(1, os.cpu_count() or 1)
+        self.memory_budget_spin = QSpinBox()
+        self.memory_budget_spin.setRange(256, 262144)
+        self.memory_budget_spin.setSingleStep(256)
+        self.memory_budget_spin.setSuffix(" MB")
+
+        # Optional `cli.py serve` instance to hand packing runs to
+        self.service_url_edit = QLineEdit()
+        self.service_url_edit.setPlaceholderText("e.g. http://127.0.0.1:8765 (empty = pack here)")
+
         # Layout
-        advanced_layout = QHBoxLayout()
-        advanced_layout.addWidget(self.export_log_checkbox)
-        advanced_layout.addWidget(self.dark_theme_checkbox)
-        advanced_layout.addWidget(self.sound_checkbox)
+        checkbox_row = QHBoxLayout()
+        checkbox_row.addWidget(self.export_log_checkbox)
+        checkbox_row.addWidget(self.dark_theme_checkbox)
+        checkbox_row.addWidget(self.sound_checkbox)
+
+        parallel_row = QHBoxLayout()
+        parallel_row.addWidget(QLabel("⚙️ Workers:"))
+        parallel_row.addWidget(self.workers_spin)
+        parallel_row.addWidget(QLabel("RAM budget:"))
+        parallel_row.addWidget(self.memory_budget_spin)
+        parallel_row.addStretch()
+
+        service_row = QHBoxLayout()
+        service_row.addWidget(QLabel("🛰️ Packer service:"))
+        service_row.addWidget(self.service_url_edit)
+
+        advanced_layout = QVBoxLayout()
+        advanced_layout.addLayout(checkbox_row)
+        advanced_layout.addLayout(parallel_row)
+        advanced_layout.addLayout(service_row)
         self.advanced_options_group.setLayout(advanced_layout)
 
     def _create_buttons(self):
@@ -146,6 +189,12 @@ class TexturePackerWindow(QWidget):
         self.pack_button = self.make_button("🔄 Start Pack", "pack_button_t")
         self.pack_button.setObjectName("packButton")
 
+        self.unpack_button = self.make_button("📤 Unpack ORM", "unpack_button_t")
+        self.unpack_button.setObjectName("unpackButton")
+
+        self.verify_button = self.make_button("🔍 Verify", "verify_button_t")
+        self.verify_button.setObjectName("verifyButton")
+
         self.delete_button = self.make_button("🗑️ Delete Files", "delete_button_t")
         self.delete_button.setObjectName("deleteButton")
 
@@ -153,6 +202,12 @@ class TexturePackerWindow(QWidget):
         start_layout.addWidget(self.pack_button)
         main_layout.addWidget(start_container, stretch=1)  # 1/3 width
 
+        self.unpack_button.setFixedHeight(60)  # Fixed 2x height
+        start_layout.addWidget(self.unpack_button)
+
+        self.verify_button.setFixedHeight(60)  # Fixed 2x height
+        start_layout.addWidget(self.verify_button)
+
         self.delete_button.setFixedHeight(60)  # Fixed 2x height
         start_layout.addWidget(self.delete_button)
 
@@ -198,6 +253,8 @@ class TexturePackerWindow(QWidget):
         self.folder_clear_button.clicked.connect(lambda: self.folder_path_edit.setText(""))
 
         self.pack_button.clicked.connect(self._start_packing)
+        self.unpack_button.clicked.connect(self._start_unpacking)
+        self.verify_button.clicked.connect(self._start_verifying)
         self.delete_button.clicked.connect(self._handle_delete_files)
 
         self.cancel_button.clicked.connect(self._cancel_packing)
@@ -205,10 +262,14 @@ class TexturePackerWindow(QWidget):
         self.buy_button.clicked.connect(self._open_donation_link)
         self.feedback_button.clicked.connect(self._open_email_client)
         self.advanced_button.clicked.connect(self._toggle_advanced_options)
+        self.preview_button.clicked.connect(self._toggle_preview)
 
         self.dark_theme_checkbox.stateChanged.connect(self._on_theme_checkbox_changed)
         self.export_log_checkbox.stateChanged.connect(self._on_checkbox_changed)
         self.sound_checkbox.stateChanged.connect(self._on_checkbox_changed)
+        self.workers_spin.valueChanged.connect(self._on_checkbox_changed)
+        self.memory_budget_spin.valueChanged.connect(self._on_checkbox_changed)
+        self.service_url_edit.editingFinished.connect(self._save_settings)
 
     def _handle_delete_files(self):
         folder_path = self.folder_path_edit.text().strip()
@@ -242,6 +303,25 @@ class TexturePackerWindow(QWidget):
         self.advanced_options_group.setVisible(visible)
         self.advanced_button.setText("Advanced Options ▲" if visible else "Advanced Options ▼")
 
+    def _toggle_preview(self):
+        visible = self.preview_button.isChecked()
+        self.preview_panel.setVisible(visible)
+        self.preview_button.setText("🖼️ Preview ▲" if visible else "🖼️ Preview ▼")
+        if visible:
+            self._refresh_preview()
+        else:
+            self.preview_panel.stop()
+
+    def _refresh_preview(self):
+        self.preview_panel.refresh(
+            self.folder_path_edit.text(),
+            {
+                'ao': self.ao_suffix.text(),
+                'roughness': self.roughness_suffix.text(),
+                'metallic': self.metallic_suffix.text()
+            },
+        )
+
     def _on_theme_checkbox_changed(self, state: int):
         dark_theme = bool(state)
         print(f"Theme checkbox changed. State: {state} -> {'dark' if dark_theme else 'light'}")
@@ -282,7 +362,9 @@ class TexturePackerWindow(QWidget):
                 for widget in app.allWidgets():
                     widget.style().unpolish(widget)
                     widget.style().polish(widget)
-                    widget.update()
+                    # Item views (e.g. the preview table header) overload
+                    # update(index), so call the plain QWidget version
+                    QWidget.update(widget)
 
                 print(f"Successfully applied {'dark' if dark_theme else 'light'} theme")
             else:
@@ -305,6 +387,9 @@ class TexturePackerWindow(QWidget):
         self.metallic_suffix.setText(settings['suffixes']['metallic'])
         self.export_log_checkbox.setChecked(settings['advanced']['export_log'])
         self.sound_checkbox.setChecked(settings['advanced']['play_sound'])
+        self.workers_spin.setValue(settings['advanced']['workers'])
+        self.memory_budget_spin.setValue(settings['advanced']['memory_budget_mb'])
+        self.service_url_edit.setText(settings['advanced']['service_url'])
 
     def _save_settings(self):
         current_settings = {
@@ -317,7 +402,10 @@ class TexturePackerWindow(QWidget):
             'advanced': {
                 'export_log': self.export_log_checkbox.isChecked(),
                 'dark_theme': self.dark_theme_checkbox.isChecked(),
-                'play_sound': self.sound_checkbox.isChecked()
+                'play_sound': self.sound_checkbox.isChecked(),
+                'workers': self.workers_spin.value(),
+                'memory_budget_mb': self.memory_budget_spin.value(),
+                'service_url': self.service_url_edit.text().strip()
             }
         }
         print(f"Saving settings: {current_settings['advanced']}")
@@ -330,9 +418,18 @@ class TexturePackerWindow(QWidget):
             self._save_settings()
 
     def _start_packing(self):
+        self._start_worker("pack")
+
+    def _start_unpacking(self):
+        self._start_worker("unpack")
+
+    def _start_verifying(self):
+        self._start_worker("verify")
+
+    def _start_worker(self, mode: str):
         folder = self.folder_path_edit.text()
-        if not folder or not os.path.isdir(folder):
-            self.log_output.append('<span style="color:orange">⚠️ Please select a valid folder before starting.</span>')
+        if not folder or not (os.path.isdir(folder) or is_archive(folder)):
+            self.log_output.append('<span style="color:orange">⚠️ Please select a valid folder or zip/tar archive before starting.</span>')
             return
 
         suffixes = {
@@ -342,12 +439,21 @@ class TexturePackerWindow(QWidget):
         }
         log_to_file = self.export_log_checkbox.isChecked()
 
+        self.run_mode = mode
         self.pack_button.setEnabled(False)
+        self.unpack_button.setEnabled(False)
+        self.verify_button.setEnabled(False)
         self.cancel_button.setEnabled(True)
         self.log_output.clear()
         self.progress_bar.setValue(0)
 
-        self.worker = PackerWorker(folder, suffixes, log_to_file)
+        self.worker = PackerWorker(
+            folder, suffixes, log_to_file,
+            max_workers=self.workers_spin.value(),
+            memory_budget_mb=self.memory_budget_spin.value(),
+            mode=mode,
+            service_url=self.service_url_edit.text().strip() or None,
+        )
         self.worker_thread = QThread()
         self.worker.moveToThread(self.worker_thread)
 
@@ -365,24 +471,33 @@ class TexturePackerWindow(QWidget):
         if hasattr(self, "worker"):
             self.worker.stopped = True
         self.pack_button.setEnabled(True)
+        self.unpack_button.setEnabled(True)
+        self.verify_button.setEnabled(True)
         self.cancel_button.setEnabled(False)
         self.log_output.append('<span style="color:black">⚠️ Packing <b>cancelled</b> by user. Finalizing packing of last texture in progress...</span>')
 
     def _handle_finished_count(self, count):
         print(f"_handle_finished_count called with: {count}")
         self.packed_files_count = count
+        verb = {"unpack": "unpacked", "verify": "verified"}.get(getattr(self, "run_mode", "pack"), "packed")
         if count == 0:
-            self.log_output.append('<span style="color:orange">⚠️ <b>No files were packed.</b></span>')
+            self.log_output.append(f'<span style="color:orange">⚠️ <b>No files were {verb}.</b></span>')
         else:
-            self.log_output.append(f'<span style="color:green">🎉 <b>{count}</b> files packed successfully.</span>')
+            self.log_output.append(f'<span style="color:green">🎉 <b>{count}</b> files {verb} successfully.</span>')
 
     def _finish_packing(self):
         print("_finish_packing called")
         self.pack_button.setEnabled(True)
+        self.unpack_button.setEnabled(True)
+        self.verify_button.setEnabled(True)
         self.cancel_button.setEnabled(False)
         self.progress_bar.setValue(100)
 
-        if hasattr(self, "packed_files_count") and self.packed_files_count == 0:
+        if getattr(self, "run_mode", "pack") == "unpack":
+            self.log_output.append('<span style="color:green">🎉 Unpacking process <b>finished</b>.</span>')
+        elif getattr(self, "run_mode", "pack") == "verify":
+            self.log_output.append('<span style="color:green">🎉 Verification <b>finished</b>.</span>')
+        elif hasattr(self, "packed_files_count") and self.packed_files_count == 0:
             self.log_output.append('<span style="color:orange">⚠️ No files matched the suffixes. Nothing packed.</span>')
         else:
             self.log_output.append('<span style="color:green">🎉 Packing process <b>finished</b>.</span>')
@@ -390,6 +505,9 @@ class TexturePackerWindow(QWidget):
         if self.sound_checkbox.isChecked():
             self._play_done_sound()
 
+        if self.preview_button.isChecked():
+            self._refresh_preview()
+
         if hasattr(self, "worker_thread"):
             self.worker_thread.quit()
             self.worker_thread.wait()
@@ -435,6 +553,10 @@ class TexturePackerWindow(QWidget):
         # Open in default browser (should be Chrome for most users)
         webbrowser.open(gmail_url)
 
+    def closeEvent(self, event):
+        self.preview_panel.stop()
+        super().closeEvent(event)
+
     def dragEnterEvent(self, event):
         if event.mimeData().hasUrls():
             event.acceptProposedAction()
@@ -443,7 +565,7 @@ class TexturePackerWindow(QWidget):
         urls = event.mimeData().urls()
         if urls:
             local_path = urls[0].toLocalFile()
-            if os.path.isdir(local_path):
+            if os.path.isdir(local_path) or is_archive(local_path):
                 self.folder_path_edit.setText(local_path)
                 self._save_settings()
 
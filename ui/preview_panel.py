@@ -0,0 +1,73 @@
+import os
+
+from PySide6.QtCore import QSize, QThread, Qt
+from PySide6.QtGui import QIcon
+from PySide6.QtWidgets import QAbstractItemView, QTableWidget, QTableWidgetItem
+
+from utils.thumbnail_cache import ThumbnailCache
+from worker.thumbnail_worker import ThumbnailWorker
+
+
+class PreviewPanel(QTableWidget):
+    """
+    One row per texture group: AO, Roughness, Metallic and packed ORM
+    thumbnails side by side. Thumbnails come from a ThumbnailWorker running
+    in its own thread and are backed by a persistent ThumbnailCache.
+    """
+
+    HEADERS = ["AO", "Roughness", "Metallic", "ORM"]
+
+    def __init__(self, cache_dir: str, thumb_size: int = 96, parent=None):
+        super().__init__(0, len(self.HEADERS), parent)
+        self.cache = ThumbnailCache(cache_dir, thumb_size)
+        self.thumb_size = thumb_size
+        self._rows: dict[str, int] = {}
+        self.worker = None
+        self.worker_thread = None
+
+        self.setHorizontalHeaderLabels(self.HEADERS)
+        self.setIconSize(QSize(thumb_size, thumb_size))
+        self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        self.verticalHeader().setDefaultSectionSize(thumb_size + 8)
+        self.horizontalHeader().setDefaultSectionSize(thumb_size + 24)
+        self.setMinimumHeight(thumb_size * 2)
+
+    def refresh(self, folder: str, suffixes: dict[str, str]):
+        """(Re)load thumbnails for *folder*; a running refresh is cancelled."""
+        self.stop()
+        self.setRowCount(0)
+        self._rows.clear()
+        if not folder or not os.path.isdir(folder):
+            return
+
+        self.worker = ThumbnailWorker(folder, suffixes, self.cache)
+        self.worker_thread = QThread()
+        self.worker.moveToThread(self.worker_thread)
+
+        self.worker.group_found.connect(self._add_group)
+        self.worker.thumbnail_ready.connect(self._set_thumbnail)
+        self.worker.finished.connect(self.worker_thread.quit)
+        self.worker_thread.started.connect(self.worker.run)
+        self.worker_thread.start()
+
+    def stop(self):
+        if self.worker_thread is not None and self.worker_thread.isRunning():
+            self.worker.stopped = True
+            self.worker_thread.quit()
+            self.worker_thread.wait()
+
+    def _add_group(self, base: str):
+        row = self.rowCount()
+        self.insertRow(row)
+        self.setVerticalHeaderItem(row, QTableWidgetItem(base))
+        self._rows[base] = row
+
+    def _set_thumbnail(self, base: str, column: str, thumb_path: str):
+        row = self._rows.get(base)
+        if row is None:
+            return
+        item = QTableWidgetItem(QIcon(thumb_path), "")
+        item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
+        item.setToolTip(base)
+        self.setItem(row, ThumbnailWorker.COLUMNS.index(column), item)
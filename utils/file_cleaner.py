@@ -1,9 +1,16 @@
 import os
 from collections.abc import Callable
 
+from core.pack_plan import PackPlan
+
 
 class FileCleaner:
-    def __init__(self, folder_path: str, suffixes: list[str], log_callback: Callable[[str], None]):
+    def __init__(
+        self,
+        folder_path: str,
+        suffixes: list[str],
+        log_callback: Callable[[str], None],
+    ):
         self.folder_path = folder_path
         self.suffixes = [s.strip().lower() for s in suffixes if s.strip()]
         self.log = log_callback
@@ -33,15 +40,13 @@ class FileCleaner:
         self.log(f"❗<b>Deletion</b> complete: <b>{deleted_count}</b> files deleted.")
 
     def _get_matching_files(self):
-        all_files = os.listdir(self.folder_path)
+        # Always a fresh scan: deletion must see what is in the folder now,
+        # not what an earlier pack run's plan saw
+        all_files = PackPlan.build(self.folder_path, {}, read_headers=False).file_names
         self.log(f"🔍 Scanning {len(all_files)} files...")
         matched_files = []
 
         for f in all_files:
-            full_path = os.path.join(self.folder_path, f)
-            if not os.path.isfile(full_path):
-                continue
-
             name_without_ext = os.path.splitext(f)[0].lower()
 
             for suffix in self.suffixes:
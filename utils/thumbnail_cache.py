@@ -0,0 +1,123 @@
+import hashlib
+import os
+
+from PIL import Image
+
+
+class ThumbnailCache:
+    """
+    Disk-backed thumbnail store.
+
+    Thumbnails are keyed by (absolute path, mtime, file size, thumbnail size),
+    so a changed or re-packed texture simply misses the cache and gets a new
+    entry; nothing ever has to be invalidated by hand. A cache hit is a single
+    os.stat() plus an existence check — no image is opened.
+
+    Entry names are '<path hash>-<version hash>.png': writing a new version
+    of a file removes its older ones, and the whole folder is trimmed to
+    *max_mb* (oldest entries first) when the cache is opened.
+    """
+
+    def __init__(self, cache_dir: str, size: int = 128, max_mb: int = 200):
+        self.cache_dir = cache_dir
+        self.size = size
+        self.max_bytes = max_mb * 1024 * 1024
+        os.makedirs(cache_dir, exist_ok=True)
+        self.prune()
+
+    def _path_key(self, path: str) -> str:
+        raw = f"{os.path.abspath(path)}|{self.size}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:20]
+
+    def _key(self, path: str, st: os.stat_result) -> str:
+        version = hashlib.sha1(f"{st.st_mtime_ns}|{st.st_size}".encode("utf-8")).hexdigest()[:20]
+        return f"{self._path_key(path)}-{version}"
+
+    def _drop_older_versions(self, path: str, keep: str):
+        prefix = self._path_key(path) + "-"
+        with os.scandir(self.cache_dir) as it:
+            stale = [e.path for e in it if e.name.startswith(prefix) and e.path != keep]
+        for stale_path in stale:
+            try:
+                os.remove(stale_path)
+            except OSError:
+                pass  # another preview worker got there first
+
+    def prune(self):
+        """Delete the oldest entries until the cache fits max_bytes."""
+        entries = []
+        with os.scandir(self.cache_dir) as it:
+            for e in it:
+                try:
+                    st = e.stat()
+                except OSError:
+                    continue
+                if e.is_file():
+                    entries.append((st.st_mtime, st.st_size, e.path))
+
+        total = sum(size for _mtime, size, _path in entries)
+        for _mtime, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+    def cached_path(self, path: str) -> str | None:
+        """Return the thumbnail file for *path* if it is already cached."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        thumb_path = os.path.join(self.cache_dir, self._key(path, st) + ".png")
+        return thumb_path if os.path.exists(thumb_path) else None
+
+    def get(self, path: str) -> str | None:
+        """
+        Return the thumbnail file for *path*, generating it on a miss.
+        Returns None if the source cannot be read.
+        """
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+
+        thumb_path = os.path.join(self.cache_dir, self._key(path, st) + ".png")
+        if os.path.exists(thumb_path):
+            return thumb_path
+
+        try:
+            thumb = self.make_thumbnail(path, self.size)
+            # Write-then-rename so a half-written file is never picked up
+            tmp_path = f"{thumb_path}.{os.getpid()}.tmp"
+            thumb.save(tmp_path, format="PNG")
+            os.replace(tmp_path, thumb_path)
+            self._drop_older_versions(path, thumb_path)
+        except Exception as e:
+            print(f"[ThumbnailCache] Failed to thumbnail {path}: {e}")
+            return None
+        return thumb_path
+
+    @staticmethod
+    def make_thumbnail(path: str, size: int) -> Image.Image:
+        """
+        Decode *path* at reduced resolution and fit it into size×size.
+
+        JPEGs are decoded through draft mode (the decoder skips DCT detail and
+        returns a 1/2 – 1/8 scale image directly). Other formats are decoded
+        once and shrunk with Image.reduce, a cheap integer box-reduction,
+        before the final high-quality resample on the already small image.
+        """
+        with Image.open(path) as img:
+            if img.format == "JPEG":
+                img.draft("RGB", (size, size))
+            if img.mode not in ("L", "RGB", "RGBA"):
+                img = img.convert("RGBA")
+
+            factor = min(img.width, img.height) // (size * 2)
+            reduced = img.reduce(factor) if factor > 1 else img.copy()
+
+        reduced.thumbnail((size, size), Image.Resampling.LANCZOS)
+        return reduced
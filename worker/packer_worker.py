@@ -1,4 +1,10 @@
-from core.texture_packer import TexturePackerCore
+from core.archive_io import ArchiveWriter, default_output_archive, is_archive
+from core.pack_client import PackClient, PackServiceError
+from core.pack_plan import PackPlan
+from core.scheduler import PackScheduler
+from core.texture_packer import UNPACK_SKIPPED, TexturePackerCore
+from core.udim import TileSetTracker, group_tiles, validate_tile_set
+from core.verify import OK, STALE, UNRECORDED, find_outputs, verify_outputs
 import os
 from datetime import datetime
 from PySide6.QtCore import QObject, Signal
@@ -10,18 +16,29 @@ class PackerWorker(QObject):
     finished = Signal()
     finished_with_count = Signal(int)
 
-    def __init__(self, folder, suffixes, log_to_file):
+    def __init__(self, folder, suffixes, log_to_file, max_workers=1, memory_budget_mb=2048,
+                 mode="pack", service_url=None):
         super().__init__()
 
         self.folder = folder
+        self.mode = mode  # 'pack', 'unpack' or 'verify'
         self.suffixes = suffixes
         self.log_to_file = log_to_file
+        self.max_workers = max_workers
+        self.memory_budget_mb = memory_budget_mb
+        self.service_url = service_url  # hand pack runs to `cli.py serve`
         self.stopped = False
         self.log_fp = None
+        self.plan = None
+        self.tile_tracker = None
+
+        # Archives are packed in one streaming pass into a sibling *_ORM.zip
+        self.is_archive = is_archive(folder)
+        log_dir = os.path.dirname(folder) if self.is_archive else folder
 
         if log_to_file:
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            self.log_file_path = os.path.join(folder, f"packing_log_{timestamp}.txt")
+            self.log_file_path = os.path.join(log_dir, f"packing_log_{timestamp}.txt")
             try:
                 self.log_fp = open(self.log_file_path, "w", encoding="utf-8")
                 self._log(f"== Log started at {timestamp} ==")
@@ -79,22 +96,21 @@ class PackerWorker(QObject):
             self._log_emit(msg, "red")
             return False
 
-        # --- 2. Raw file list ---
+        # --- 2. Single planning scan (shared by diagnostics and packing) ---
         try:
-            all_entries = os.listdir(self.folder)
+            # Header sizes drive both the scheduler's admission and the
+            # serial loop's choice of decode / encode concurrency
+            self.plan = PackPlan.build(self.folder, self.suffixes)
         except Exception as e:
             msg = f"❌ Cannot list folder contents: {e}"
             self._log_emit(msg, "red")
             return False
 
-        files_only = [
-            f for f in all_entries
-            if os.path.isfile(os.path.join(self.folder, f))
-        ]
+        files_only = list(self.plan.file_names)
 
-        self._log(f"📂 Folder contains {len(all_entries)} entries "
+        self._log(f"📂 Folder contains {self.plan.entry_count} entries "
                   f"({len(files_only)} files, "
-                  f"{len(all_entries) - len(files_only)} subdirectories)")
+                  f"{self.plan.subdir_count} subdirectories)")
 
         if not files_only:
             self._log_emit("⚠️ No files found in folder.", "orange")
@@ -114,13 +130,14 @@ class PackerWorker(QObject):
         required_suffixes = list(self.suffixes.values())
         self._log(f"   Required suffixes: {required_suffixes}")
 
-        matched: dict[str, list[str]] = {}   # suffix -> list of matching filenames
-        for suf in required_suffixes:
-            hits = [
-                f for f in files_only
-                if os.path.splitext(f)[0].upper().endswith(suf.upper())
-            ]
-            matched[suf] = hits
+        # suffix -> list of matching filenames, filled in one pass over the files
+        matched: dict[str, list[str]] = {suf: [] for suf in required_suffixes}
+        upper_suffixes = [(suf, suf.upper()) for suf in required_suffixes]
+        for f in files_only:
+            stem = os.path.splitext(f)[0].upper()
+            for suf, upper in upper_suffixes:
+                if stem.endswith(upper):
+                    matched[suf].append(f)
 
         any_match = any(v for v in matched.values())
 
@@ -145,6 +162,22 @@ class PackerWorker(QObject):
     # ------------------------------------------------------------------ #
 
     def run(self):
+        if self.mode == "unpack":
+            self._run_unpack()
+            return
+
+        if self.mode == "verify":
+            self._run_verify()
+            return
+
+        if self.is_archive:
+            self._run_archive()
+            return
+
+        if self.service_url:
+            self._run_service()
+            return
+
         packed_count = 0
 
         # --- Diagnostics first ---
@@ -155,17 +188,8 @@ class PackerWorker(QObject):
                 self.log_fp.close()
             return
 
-        # --- Discover texture groups ---
-        try:
-            textures = TexturePackerCore.find_textures(self.folder, self.suffixes)
-        except Exception as e:
-            msg = f"❌ find_textures raised an exception: {e}"
-            self._log_emit(msg, "red")
-            self.finished_with_count.emit(0)
-            self.finished.emit()
-            if self.log_fp:
-                self.log_fp.close()
-            return
+        # --- Texture groups come from the diagnostics scan ---
+        textures = self.plan.textures()
 
         total = len(textures)
         required_suffixes = list(self.suffixes.values())
@@ -174,9 +198,9 @@ class PackerWorker(QObject):
         self._log(f"Required suffixes: {required_suffixes}")
 
         if total == 0:
-            # Extra hint logged after find_textures returns empty
+            # Extra hint logged after the planning scan comes back empty
             self._log(
-                "⚠️ find_textures returned 0 groups. Possible causes:\n"
+                "⚠️ The planning scan found 0 groups. Possible causes:\n"
                 "   1. Suffix case mismatch (e.g. files use '_ao' but config says '_AO').\n"
                 "   2. Unsupported file extension (e.g. .tga, .tif not in the allowed list).\n"
                 "   3. find_textures only scans the top-level folder but files are in subfolders.\n"
@@ -194,7 +218,19 @@ class PackerWorker(QObject):
                 self.log_fp.close()
             return
 
+        textures = self._prepare_tile_sets(textures)
+
+        if self.max_workers > 1:
+            packed_count = self._run_scheduled(textures, total)
+            self._log(f"🏁 Finished. Packed {packed_count}/{total} successfully.")
+            self.finished_with_count.emit(packed_count)
+            self.finished.emit()
+            if self.log_fp:
+                self.log_fp.close()
+            return
+
         # --- Process each group ---
+        pixels = {g.base: g.pixels for g in self.plan.groups}
         for i, (base, maps) in enumerate(textures.items()):
             if self.stopped:
                 self._log_emit("⚠️ Operation cancelled by user.", "orange")
@@ -214,22 +250,337 @@ class PackerWorker(QObject):
                 continue
 
             try:
-                success, message = TexturePackerCore.process_texture(
-                    base, maps, self.folder, self.suffixes
-                )
+                success, message = self._pack_serial(base, maps, pixels.get(base, 0))
             except Exception as e:
+                if self.tile_tracker and self.tile_tracker.owns(base):
+                    self._report_result(base, False, str(e))
+                    continue
                 msg = f"❌ Exception while processing '{base}': {e}"
                 self._log_emit(msg, "red")
                 continue
 
             if success:
-                self._log_emit(f"✅ {message}", "green")
                 packed_count += 1
-            else:
-                self._log_emit(f"⚠️ Error: {message}", "red")
+            self._report_result(base, success, message)
 
         self._log(f"🏁 Finished. Packed {packed_count}/{total} successfully.")
         self.finished_with_count.emit(packed_count)
         self.finished.emit()
         if self.log_fp:
             self.log_fp.close()
+
+    def _pack_serial(self, base: str, maps: dict[str, str], pixels: int) -> tuple[bool, str]:
+        """
+        Pack one group on its own, as fast as the RAM budget allows: all
+        three decodes at once and a multi-threaded encode when their peak
+        fits, one decode at a time when only a single one does, and the
+        scheduler's low-memory path beyond that (or for unknown sizes).
+        """
+        budget = self.memory_budget_mb * 1024 * 1024
+        single = pixels * PackScheduler.BYTES_PER_PIXEL
+        if pixels and 3 * single <= budget:
+            return TexturePackerCore.process_texture(
+                base, maps, self.folder, self.suffixes,
+                concurrent_decode=True, parallel_encode=True,
+            )
+        if pixels and single <= budget:
+            return TexturePackerCore.process_texture(base, maps, self.folder, self.suffixes)
+        return PackScheduler.pack_low_memory(base, maps, self.folder, self.suffixes)
+
+    def _prepare_tile_sets(self, textures: dict[str, dict[str, str]]) -> dict[str, dict[str, str]]:
+        """
+        Find UDIM / UV-tile sets among the groups and check each set as a
+        whole. Sets with a tile missing a map are left out entirely; the
+        remaining tiles still pack one group at a time (in parallel with
+        workers > 1) but are reported per asset via _report_result.
+        """
+        tile_sets = group_tiles(textures)
+        if not tile_sets:
+            return textures
+
+        sizes = {g.base: (g.width, g.height) for g in self.plan.groups if g.pixels}
+        valid = {}
+        for name, tile_set in tile_sets.items():
+            errors, warnings = validate_tile_set(tile_set, textures, self.suffixes, sizes)
+            self._log(f"🧩 Tile set {name}: {len(tile_set.tiles)} tile(s) ({tile_set.tile_range})")
+            for warning in warnings:
+                self._log_emit(f"⚠️ {name}: {warning}", "orange")
+            if errors:
+                self._log_emit(
+                    f"⚠️ Skipping tile set '{name}': {'; '.join(errors)}", "orange"
+                )
+                continue
+            valid[name] = tile_set
+
+        skipped = {
+            base for name, ts in tile_sets.items() if name not in valid for base in ts.bases
+        }
+        self.tile_tracker = TileSetTracker(valid)
+        return {base: maps for base, maps in textures.items() if base not in skipped}
+
+    def _report_result(self, base: str, success: bool, message: str):
+        """Report one group's result; tiles are summed up per tile set."""
+        if self.tile_tracker and self.tile_tracker.owns(base):
+            self._log(f"   {'✅' if success else '⚠️'} tile {base}: {message}")
+            summary = self.tile_tracker.record(base, success, message)
+            if summary:
+                ok, text = summary
+                self._log_emit(f"{'✅' if ok else '⚠️'} {text}", "green" if ok else "red")
+            return
+
+        if success:
+            self._log_emit(f"✅ {message}", "green")
+        else:
+            self._log_emit(f"⚠️ Error in '{base}': {message}", "red")
+
+    def _run_scheduled(self, textures: dict[str, dict[str, str]], total: int) -> int:
+        """
+        Pack groups in a process pool, admitted against the RAM budget.
+        Returns the number of groups packed.
+        """
+        required_suffixes = [s.lower() for s in self.suffixes.values()]
+        for base, maps in textures.items():
+            missing = [key for key in required_suffixes if key not in maps]
+            if missing:
+                msg = (
+                    f"⚠️ Skipping '{base}': missing {', '.join(sorted(missing))}. "
+                    f"Present: {', '.join(sorted(maps.keys()))}"
+                )
+                self._log_emit(msg, "orange")
+
+        scheduler = PackScheduler(self.memory_budget_mb, self.max_workers)
+        jobs = [j for j in scheduler.jobs_from_plan(self.plan) if j.base in textures]
+        spilled = sum(1 for j in jobs if j.est_bytes > scheduler.memory_budget)
+        self._log(f"   Scheduling {len(jobs)} group(s) on {self.max_workers} worker(s), "
+                  f"budget {self.memory_budget_mb} MB, {spilled} oversized")
+
+        done = total - len(jobs)
+        packed_count = 0
+
+        def on_result(job, success, message):
+            nonlocal done, packed_count
+            done += 1
+            self.progress_percent.emit(int(done / total * 100))
+            if success:
+                packed_count += 1
+            self._report_result(job.base, success, message)
+
+        try:
+            scheduler.run(jobs, self.folder, self.suffixes, on_result, lambda: self.stopped)
+        except Exception as e:
+            self._log_emit(f"❌ Scheduler failed: {e}", "red")
+
+        if self.stopped:
+            self._log_emit("⚠️ Operation cancelled by user.", "orange")
+        return packed_count
+
+    def _run_archive(self):
+        """
+        Pack a zip/tar bundle in a single sequential pass.
+        Members are streamed from the archive and the ORM outputs are stored
+        (uncompressed) in '<bundle>_ORM.zip' next to it — nothing is extracted.
+        """
+        packed_count = 0
+        seen = 0
+        out_path = default_output_archive(self.folder)
+        required_suffixes = [s.lower() for s in self.suffixes.values()]
+
+        self._log(f"🔧 Streaming archive: {self.folder}")
+        self._log(f"   Output archive: {out_path}")
+
+        try:
+            with ArchiveWriter(out_path) as writer:
+                for base, maps in TexturePackerCore.iter_archive_groups(self.folder, self.suffixes):
+                    if self.stopped:
+                        self._log_emit("⚠️ Operation cancelled by user.", "orange")
+                        break
+
+                    seen += 1
+
+                    missing = [key for key in required_suffixes if key not in maps]
+                    if missing:
+                        msg = (
+                            f"⚠️ Skipping '{base}': missing {', '.join(sorted(missing))}. "
+                            f"Present: {', '.join(sorted(maps.keys()))}"
+                        )
+                        self._log_emit(msg, "orange")
+                        continue
+
+                    success, message = TexturePackerCore.process_texture(
+                        base, maps, "", self.suffixes, writer=writer
+                    )
+                    if success:
+                        self._log_emit(f"✅ {message}", "green")
+                        packed_count += 1
+                    else:
+                        self._log_emit(f"⚠️ Error: {message}", "red")
+        except Exception as e:
+            self._log_emit(f"❌ Failed to read archive: {e}", "red")
+
+        self._log(f"🏁 Finished. Packed {packed_count}/{seen} successfully.")
+        self.finished_with_count.emit(packed_count)
+        self.finished.emit()
+        if self.log_fp:
+            self.log_fp.close()
+
+    def _run_unpack(self):
+        """
+        Split every *_ORM texture in the folder back into AO / roughness /
+        metallic maps named with the first configured suffix of each channel.
+        Uses the same scheduler as packing when more than one worker is set;
+        bundles are streamed in one pass instead.
+        """
+        out_folder = os.path.dirname(self.folder) if self.is_archive else self.folder
+        self._log(f"🔧 Starting unpack operation in: {self.folder}")
+
+        try:
+            packed = TexturePackerCore.find_packed_textures(self.folder)
+        except Exception as e:
+            self._log_emit(f"❌ Cannot list folder contents: {e}", "red")
+            self._finish_run(0)
+            return
+
+        total = len(packed)
+        self._log(f"Found {total} packed texture(s) to unpack.")
+        if total == 0:
+            self._emit_progress("⚠️ No *_ORM textures found.", "orange")
+            self._finish_run(0)
+            return
+
+        unpacked_count = 0
+        skipped_count = 0
+        done = 0
+
+        def on_result(base, success, message):
+            nonlocal unpacked_count, skipped_count, done
+            done += 1
+            self.progress_percent.emit(int(done / total * 100))
+            if success and message.startswith(UNPACK_SKIPPED):
+                self._log_emit(f"➖ {message}", "orange")
+                skipped_count += 1
+            elif success:
+                self._log_emit(f"✅ {message}", "green")
+                unpacked_count += 1
+            else:
+                self._log_emit(f"⚠️ Error in '{base}': {message}", "red")
+
+        if self.is_archive:
+            # One streaming pass over the bundle; opening each member on its
+            # own would decompress a tarball again for every ORM
+            try:
+                for base, data in TexturePackerCore.iter_archive_packed(self.folder):
+                    if self.stopped:
+                        break
+                    on_result(base, *TexturePackerCore.unpack_texture(base, data, out_folder, self.suffixes))
+            except Exception as e:
+                self._log_emit(f"❌ Cannot read archive: {e}", "red")
+        elif self.max_workers > 1:
+            scheduler = PackScheduler(self.memory_budget_mb, self.max_workers)
+            try:
+                scheduler.run(
+                    scheduler.plan_unpack(packed), out_folder, self.suffixes,
+                    lambda job, success, message: on_result(job.base, success, message),
+                    lambda: self.stopped,
+                    task=TexturePackerCore.unpack_group,
+                )
+            except Exception as e:
+                self._log_emit(f"❌ Scheduler failed: {e}", "red")
+        else:
+            for base, orm_path in packed.items():
+                if self.stopped:
+                    break
+                success, message = TexturePackerCore.unpack_texture(
+                    base, orm_path, out_folder, self.suffixes
+                )
+                on_result(base, success, message)
+
+        if self.stopped:
+            self._log_emit("⚠️ Operation cancelled by user.", "orange")
+        skipped_note = f", {skipped_count} skipped (maps already exist)" if skipped_count else ""
+        self._log(f"🏁 Finished. Unpacked {unpacked_count}/{total} successfully{skipped_note}.")
+        self._finish_run(unpacked_count)
+
+    def _run_verify(self):
+        """
+        Check every *_ORM.png in the folder against the checksum and source
+        stamps recorded at pack time (see core.verify). The count reported
+        at the end is the number of outputs that passed.
+        """
+        self._log(f"🔍 Starting verification in: {self.folder}")
+        if self.is_archive:
+            self._log_emit("⚠️ Verify works on folders; extract the archive first.", "orange")
+            self._finish_run(0)
+            return
+
+        try:
+            paths = find_outputs(self.folder)
+        except Exception as e:
+            self._log_emit(f"❌ Cannot list folder contents: {e}", "red")
+            self._finish_run(0)
+            return
+
+        total = len(paths)
+        self._log(f"Found {total} output(s) to verify.")
+        if total == 0:
+            self._emit_progress("⚠️ No *_ORM textures found.", "orange")
+            self._finish_run(0)
+            return
+
+        passed = unrecorded = 0
+        for done, result in enumerate(verify_outputs(paths, self.max_workers), 1):
+            self.progress_percent.emit(int(done / total * 100))
+            name = os.path.basename(result.path)
+            if result.status == OK:
+                passed += 1
+                self._log(f"✅ {name}")
+            elif result.status == UNRECORDED:
+                passed += 1
+                unrecorded += 1
+                self._log(f"ℹ️ {name}: {result.message}")
+            else:
+                color = "orange" if result.status == STALE else "red"
+                self._log_emit(f"❌ <b>{name}</b>: {result.status} — {result.message}", color)
+            if self.stopped:
+                self._log_emit("⚠️ Operation cancelled by user.", "orange")
+                break
+
+        if unrecorded:
+            self._log_emit(
+                f"ℹ️ {unrecorded} output(s) have no pack record (packed by an older version); "
+                f"they were only checked to decode cleanly.", "orange"
+            )
+        self._log(f"🏁 Finished. {passed}/{total} output(s) passed verification.")
+        self._finish_run(passed)
+
+    def _run_service(self):
+        """
+        Hand the folder to a running packer service (see core.pack_service)
+        and report its per-group results. The service scans and packs the
+        folder itself, so it must be able to see the same path.
+        """
+        self._log_emit(f"🛰️ Sending '{self.folder}' to packer service {self.service_url}")
+        try:
+            reply = PackClient(self.service_url).pack_folder(os.path.abspath(self.folder), self.suffixes)
+        except PackServiceError as e:
+            self._log_emit(f"❌ {e}", "red")
+            self._finish_run(0)
+            return
+
+        packed_count = 0
+        results = reply["results"]
+        for r in results:
+            if r["ok"]:
+                packed_count += 1
+                self._log_emit(f"✅ {r['message']} ({r['timings']['total_ms']:.0f} ms)", "green")
+            else:
+                self._log_emit(f"⚠️ Error in '{r['base']}': {r['message']}", "red")
+
+        self.progress_percent.emit(100)
+        self._log(f"🏁 Finished. Packed {packed_count}/{len(results)} successfully.")
+        self._finish_run(packed_count)
+
+    def _finish_run(self, count: int):
+        self.finished_with_count.emit(count)
+        self.finished.emit()
+        if self.log_fp:
+            self.log_fp.close()
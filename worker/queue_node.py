@@ -0,0 +1,87 @@
+import os
+import socket
+import threading
+import time
+from collections.abc import Callable
+
+from core.texture_packer import TexturePackerCore
+from core.work_queue import QueueJob, WorkQueue
+
+
+class QueueNode:
+    """
+    Headless packer node that drains a WorkQueue.
+
+    Unlike PackerWorker this class has no Qt dependency, so it can run on
+    render-farm machines or as several local processes pointing at the same
+    shared folder. While a group is being packed a background thread keeps
+    the lease alive; if the heartbeat ever fails the result is still written
+    to disk but not reported, since another node already owns the job.
+    """
+
+    def __init__(
+        self,
+        queue: WorkQueue,
+        node_id: str | None = None,
+        poll_interval: float = 1.0,
+        log_callback: Callable[[str], None] = print,
+    ):
+        self.queue = queue
+        self.node_id = node_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.poll_interval = poll_interval
+        self.log = log_callback
+        self.stopped = False
+
+    def run(self, run_id: str | None = None, exit_when_drained: bool = True) -> int:
+        """
+        Claim and pack jobs until stopped (or until the queue is drained when
+        *exit_when_drained* is set). Returns the number of groups packed.
+        """
+        packed_count = 0
+        self.log(f"🔧 Node {self.node_id} polling {self.queue.db_path}")
+
+        while not self.stopped:
+            job = self.queue.claim(self.node_id, run_id)
+            if job is None:
+                if exit_when_drained and self.queue.is_drained(run_id):
+                    break
+                # Other nodes still hold leases — they may expire and come back
+                time.sleep(self.poll_interval)
+                continue
+
+            if self._process(job):
+                packed_count += 1
+
+        self.log(f"🏁 Node {self.node_id} finished. Packed {packed_count} group(s).")
+        return packed_count
+
+    def _process(self, job: QueueJob) -> bool:
+        stop_heartbeat = threading.Event()
+        lease_lost = threading.Event()
+
+        def _beat():
+            # Renew well before the lease runs out
+            interval = max(self.queue.lease_seconds / 3, 0.1)
+            while not stop_heartbeat.wait(interval):
+                if not self.queue.heartbeat(job.job_id, self.node_id):
+                    lease_lost.set()
+                    return
+
+        beat_thread = threading.Thread(target=_beat, daemon=True)
+        beat_thread.start()
+        try:
+            success, message = TexturePackerCore.process_texture(
+                job.base, job.maps, job.output_folder, job.suffixes
+            )
+        except Exception as e:
+            success, message = False, str(e)
+        finally:
+            stop_heartbeat.set()
+            beat_thread.join()
+
+        if lease_lost.is_set() or not self.queue.complete(job.job_id, self.node_id, success, message):
+            self.log(f"⚠️ Lease on '{job.base}' was lost; result discarded.")
+            return False
+
+        self.log(f"{'✅' if success else '⚠️ Error:'} {message}")
+        return success
@@ -0,0 +1,73 @@
+import os
+
+from PySide6.QtCore import QObject, Signal
+
+from core.texture_packer import TexturePackerCore
+from utils.thumbnail_cache import ThumbnailCache
+
+
+class ThumbnailWorker(QObject):
+    """
+    Build the preview grid contents off the GUI thread.
+
+    Emits one group_found per texture group (so the panel can lay out rows
+    immediately) followed by thumbnail_ready as each thumbnail becomes
+    available. Cached thumbnails are sent in a first sweep so an already
+    browsed folder fills in at once; only misses are decoded afterwards.
+    """
+    group_found = Signal(str)                   # base
+    thumbnail_ready = Signal(str, str, str)     # base, column key, thumbnail path
+    finished = Signal()
+
+    COLUMNS = ('ao', 'roughness', 'metallic', 'orm')
+
+    def __init__(self, folder, suffixes, cache: ThumbnailCache):
+        super().__init__()
+        self.folder = folder
+        self.suffixes = suffixes
+        self.cache = cache
+        self.stopped = False
+
+    def _sources(self) -> list[tuple[str, str, str]]:
+        textures = TexturePackerCore.find_textures(self.folder, self.suffixes)
+        sources = []
+        for base in sorted(textures):
+            maps = textures[base]
+            self.group_found.emit(base)
+            for tex_type in ('ao', 'roughness', 'metallic'):
+                path = maps.get(self.suffixes[tex_type].lower())
+                if path:
+                    sources.append((base, tex_type, path))
+            orm_path = os.path.join(self.folder, f"{base}_ORM.png")
+            if os.path.exists(orm_path):
+                sources.append((base, 'orm', orm_path))
+        return sources
+
+    def run(self):
+        try:
+            sources = self._sources()
+        except Exception as e:
+            print(f"[ThumbnailWorker] Failed to scan {self.folder}: {e}")
+            self.finished.emit()
+            return
+
+        # --- 1. Cache hits: no decoding at all ---
+        misses = []
+        for base, column, path in sources:
+            if self.stopped:
+                break
+            thumb_path = self.cache.cached_path(path)
+            if thumb_path:
+                self.thumbnail_ready.emit(base, column, thumb_path)
+            else:
+                misses.append((base, column, path))
+
+        # --- 2. Misses: reduced-resolution decode, then store ---
+        for base, column, path in misses:
+            if self.stopped:
+                break
+            thumb_path = self.cache.get(path)
+            if thumb_path:
+                self.thumbnail_ready.emit(base, column, thumb_path)
+
+        self.finished.emit()